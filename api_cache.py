@@ -0,0 +1,162 @@
+"""Cache disque partagé des réponses API-sports (SQLite).
+
+Toutes les instances de l'app (workers, réplicas sur un même volume, redémarrages)
+lisent et écrivent le même fichier : un nœud qui redémarre sert sa première page
+depuis le disque au lieu du réseau.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlencode
+
+DEFAULT_DB_PATH = os.environ.get(
+    "PREDICTECH_CACHE_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "api_cache.sqlite3"),
+)
+
+# (fraîcheur, fenêtre "stale") en secondes par endpoint.
+# Dans la fenêtre stale on sert la copie disque et on revalide en arrière-plan.
+ENDPOINT_TTLS = {
+    "/fixtures": (1800, 6 * 3600),
+    "/fixtures/headtohead": (24 * 3600, 7 * 24 * 3600),
+    "/standings": (6 * 3600, 48 * 3600),
+    "/odds": (600, 3600),
+    # Réponses du modèle de langue (oracle.py), sans fenêtre stale
+    "/llm/chat": (6 * 3600, 0),
+}
+DEFAULT_TTL = (3600, 6 * 3600)
+
+# Verrou de revalidation inter-processus : un seul worker rafraîchit une clé à la fois
+REFRESH_LOCK_SECONDS = 30
+
+
+def ttl_for(endpoint):
+    return ENDPOINT_TTLS.get(endpoint, DEFAULT_TTL)
+
+
+def make_key(endpoint, params):
+    return f"{endpoint}?{urlencode(sorted((params or {}).items()))}"
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {}
+        with self._conn() as db:
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    endpoint TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    refresh_lock REAL NOT NULL DEFAULT 0
+                )
+            """)
+        self.purge()
+
+    # Une connexion par thread (sqlite3 interdit le partage entre threads)
+    def _conn(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def count(self, endpoint, outcome):
+        with self._lock:
+            c = self._counters.setdefault(endpoint, {"hit": 0, "stale": 0, "miss": 0, "error": 0})
+            c[outcome] += 1
+
+    def reset_stats(self):
+        with self._lock: self._counters = {}
+
+    def stats(self):
+        with self._lock:
+            per_endpoint = {ep: dict(c) for ep, c in self._counters.items()}
+        totals = {k: sum(c[k] for c in per_endpoint.values()) for k in ("hit", "stale", "miss", "error")}
+        served = totals["hit"] + totals["stale"] + totals["miss"]
+        totals["hit_ratio"] = round((totals["hit"] + totals["stale"]) / served, 3) if served else 0.0
+        return {"total": totals, "endpoints": per_endpoint}
+
+    def get(self, key):
+        row = self._conn().execute("SELECT payload, fetched_at FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None: return None
+        return json.loads(row[0]), time.time() - row[1]
+
+    def set(self, key, endpoint, payload):
+        with self._conn() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO responses (key, endpoint, payload, fetched_at, refresh_lock) VALUES (?, ?, ?, ?, 0)",
+                (key, endpoint, json.dumps(payload, separators=(",", ":")), time.time()),
+            )
+
+    def purge(self):
+        # Supprime ce qui est sorti de toutes les fenêtres stale
+        max_age = max(fresh + stale for fresh, stale in list(ENDPOINT_TTLS.values()) + [DEFAULT_TTL])
+        with self._conn() as db:
+            db.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - max_age,))
+
+    def _claim_refresh(self, key):
+        now = time.time()
+        with self._conn() as db:
+            cur = db.execute(
+                "UPDATE responses SET refresh_lock = ? WHERE key = ? AND refresh_lock < ?",
+                (now + REFRESH_LOCK_SECONDS, key, now),
+            )
+            return cur.rowcount == 1
+
+    def _revalidate(self, key, endpoint, loader):
+        try:
+            payload = loader()
+            if payload is not None:
+                self.set(key, endpoint, payload)
+        except Exception:
+            self.count(endpoint, "error")
+
+    def peek(self, endpoint, params):
+        """Copie disque encore dans la fenêtre stale, sans appel réseau ni revalidation ; None sinon."""
+        cached = self.get(make_key(endpoint, params))
+        if cached is None or cached[1] >= sum(ttl_for(endpoint)): return None
+        return cached[0]
+
+    def fetch(self, endpoint, params, loader):
+        """Renvoie la réponse pour (endpoint, params) ; `loader()` fait l'appel réseau.
+
+        `loader` renvoie None pour signaler une réponse à ne pas mettre en cache
+        (quota épuisé, erreur API) : on retombe alors sur la dernière copie disque.
+        """
+        key = make_key(endpoint, params)
+        fresh, stale = ttl_for(endpoint)
+        cached = self.get(key)
+
+        if cached is not None:
+            payload, age = cached
+            if age < fresh:
+                self.count(endpoint, "hit")
+                return payload
+            if age < fresh + stale:
+                self.count(endpoint, "stale")
+                if self._claim_refresh(key):
+                    threading.Thread(target=self._revalidate, args=(key, endpoint, loader), daemon=True).start()
+                return payload
+
+        self.count(endpoint, "miss")
+        try:
+            payload = loader()
+        except Exception:
+            self.count(endpoint, "error")
+            if cached is not None: return cached[0]
+            raise
+        if payload is None:
+            self.count(endpoint, "error")
+            return cached[0] if cached is not None else None
+        self.set(key, endpoint, payload)
+        return payload
@@ -1,43 +1,49 @@
 import streamlit as st
-import requests
-import hashlib
-import random
-import plotly.graph_objects as go
+import json
 from datetime import datetime, timedelta
-from groq import Groq
+from html import escape
+from itertools import groupby
 import time
-import math
+import metrics
+import sports_api
+import oracle
+import live
+from sports_api import TOP_LEAGUES
+from scanner import ValueScanner
+import prefetch
+from model import (build_team_index, calculate_true_stats, calculate_probabilities,
+                   calculate_goals_probabilities, detect_value_bet)
 
 # --- CONFIGURATION ---
 st.set_page_config(page_title="PredicTech | OS", layout="wide", initial_sidebar_state="collapsed")
 
+# Secrets lus et clients configurés une fois par processus, pas à chaque rerun
+@st.cache_resource(show_spinner=False)
+def load_settings():
+    sports_api.configure(st.secrets["API_SPORTS_KEY"])
+    oracle.configure(st.secrets["GROQ_API_KEY"])
+    return {'admin_token': st.secrets.get("ADMIN_TOKEN")}
+
 try:
-    API_KEY = st.secrets["API_SPORTS_KEY"]
-    GROQ_KEY = st.secrets["GROQ_API_KEY"]
+    settings = load_settings()
 except:
     st.error("⚠️ Clés API introuvables. Vérifie tes Secrets sur Streamlit.")
     st.stop()
 
-HEADERS = {"x-apisports-key": API_KEY}
-BASE_URL = "https://v3.football.api-sports.io"
-
-# Compétitions majeures du catalogue
-TOP_LEAGUES = {
-    2: "🇪🇺 Champions League",
-    3: "🇪🇺 Europa League",
-    39: "🇬🇧 Premier League",
-    61: "🇫🇷 Ligue 1",
-    78: "🇩🇪 Bundesliga",
-    135: "🇮🇹 Serie A",
-    140: "🇪🇸 La Liga"
-}
-
 if 'view' not in st.session_state:
     st.session_state.view = 'home'
 
+# Compteurs de reruns (par session et globaux) et chrono du rendu de la vue
+_render_t0 = time.perf_counter()
+_render_view = st.session_state.view
+if 'reruns' not in st.session_state:
+    st.session_state.reruns = 0
+    metrics.inc("sessions_total")
+st.session_state.reruns += 1
+metrics.inc("reruns_total", view=_render_view)
+
 # --- STYLE CSS TERMINAL PRO ---
-st.markdown("""
-    <style>
+APP_CSS = """
     @import url('https://fonts.googleapis.com/css2?family=JetBrains+Mono:wght@400;700&display=swap');
     * { font-family: 'JetBrains Mono', monospace; }
     .stApp { background-color: #05070a; color: #e0e0e0; }
@@ -52,6 +58,18 @@ st.markdown("""
         padding: 20px; transition: 0.3s; text-align: center; margin-bottom: 15px;
     }
     .match-card:hover { border-color: #00ff88; transform: translateY(-3px); box-shadow: 0 10px 20px rgba(0,255,136,0.1); }
+    .match-grid { display: grid; grid-template-columns: repeat(3, minmax(0, 1fr)); gap: 15px; margin-bottom: 15px; }
+    .match-grid .match-card { display: block; margin-bottom: 0; color: #e0e0e0; text-decoration: none; }
+    .match-card .card-time { font-weight: bold; color: #8892b0; font-size: 12px; background: #1a1c23; padding: 4px 8px; border-radius: 5px; }
+    .match-card .card-cta { margin-top: 15px; border: 1px solid #00ff88; color: #00ff88; border-radius: 8px; padding: 6px; font-size: 13px; font-weight: bold; transition: 0.3s; }
+    .match-card:hover .card-cta { background: #00ff88; color: #05070a; box-shadow: 0 0 10px #00ff88; }
+    @media (max-width: 900px) { .match-grid { grid-template-columns: minmax(0, 1fr); } }
+    .live-score { font-size: 26px; font-weight: 900; color: white; }
+    .live-minute { color: #ff4b4b; font-weight: bold; font-size: 12px; }
+    .live-probs { display: flex; justify-content: space-around; margin-top: 10px; font-size: 12px; color: #8892b0; }
+    .live-probs b { color: #00ff88; }
+    .live-flash { animation: live-flash 2s ease-out; }
+    @keyframes live-flash { from { border-color: #ff4b4b; box-shadow: 0 0 15px rgba(255,75,75,0.5); } }
     .stButton>button {
         background: #11141b; border: 1px solid #00ff88; color: #00ff88;
         border-radius: 8px; transition: 0.3s; width: 100%; font-weight: bold;
@@ -82,196 +100,369 @@ st.markdown("""
         font-weight: bold !important;
         font-size: 14px !important;
     }
-    </style>
-    """, unsafe_allow_html=True)
-
-# --- OUTILS DE FORMATAGE ET MATHS ---
+"""
+
+def inject_css():
+    """Feuille de style (et police) ajoutée une fois par session au <head> de la page : elle y reste
+    d'un rerun à l'autre, au lieu de renvoyer tout le bloc <style> à chaque exécution du script."""
+    if st.session_state.get('css_injected'): return
+    css = json.dumps(APP_CSS).replace("</", "<\\/")
+    st.html(
+        "<script>if (!document.getElementById('predictech-css')) {"
+        "const s = document.createElement('style'); s.id = 'predictech-css'; "
+        f"s.textContent = {css}; document.head.appendChild(s); }}</script>",
+        unsafe_allow_javascript=True,
+    )
+    st.session_state.css_injected = True
+
+inject_css()
+
+# --- OUTILS DE FORMATAGE ---
 def format_form(form_string):
     if not form_string or form_string == 'Non dispo': return "N/A"
     form_string = form_string[-5:]
     return form_string.replace('W', '🟢').replace('D', '⚪').replace('L', '🔴')
 
-def poisson_prob(lmbda, k):
-    return (math.exp(-lmbda) * (lmbda**k)) / math.factorial(k)
+CARDS_PER_PAGE = 24
+
+def fixture_card(f):
+    """Champs d'affichage d'une carte du catalogue (date parsée une seule fois, noms échappés)."""
+    kickoff = datetime.fromisoformat(f.date.replace('Z', '+00:00'))
+    return {
+        'id': f.id, 'league_id': f.league_id,
+        'time': kickoff.strftime('%H:%M'), 'day_time': kickoff.strftime('%d/%m - %H:%M'),
+        'home': escape(f.home.name), 'away': escape(f.away.name),
+        'logo_h': escape(f.home.logo, quote=True), 'logo_a': escape(f.away.logo, quote=True),
+    }
 
-def calculate_goals_probabilities(xg_h, xg_a):
-    prob_h = [poisson_prob(xg_h, i) for i in range(6)]
-    prob_a = [poisson_prob(xg_a, i) for i in range(6)]
-    btts_yes = (1 - prob_h[0]) * (1 - prob_a[0])
-    under_25 = (prob_h[0]*prob_a[0]) + (prob_h[1]*prob_a[0]) + (prob_h[0]*prob_a[1]) + \
-               (prob_h[1]*prob_a[1]) + (prob_h[2]*prob_a[0]) + (prob_h[0]*prob_a[2])
-    return int((1 - under_25) * 100), int(btts_yes * 100)
+def league_html(league_id, cards, show_date):
+    """Une ligue = un seul bloc HTML, aucun widget par match. Clic simple : match_picker ; le lien
+    ?match=<id> sert au nouvel onglet et au partage."""
+    time_field = 'day_time' if show_date else 'time'
+    items = "".join(
+        f"<a class='match-card' href='?match={c['id']}' data-match='{c['id']}'>"
+        f"<div style='display:flex; justify-content:space-around; align-items:center; margin-bottom:15px;'>"
+        f"<img src='{c['logo_h']}' width='45'><span class='card-time'>{c[time_field]}</span><img src='{c['logo_a']}' width='45'></div>"
+        f"<p style='font-size:15px; font-weight:bold; margin:0;'>{c['home']}<br><span style='color:#2d303e; font-size:12px;'>VS</span><br>{c['away']}</p>"
+        f"<div class='card-cta'>ANALYSER LE MATCH</div></a>"
+        for c in cards
+    )
+    return f"<div class='league-header'>{TOP_LEAGUES.get(league_id, 'Compétition')}</div><div class='match-grid'>{items}</div>"
+
+def live_minute(entry):
+    f = entry['fixture']
+    if entry['finished_at']: return "TERMINÉ"
+    if f.status == 'HT': return "MI-TEMPS"
+    return f"{f.elapsed}'" if f.elapsed is not None else f.status
+
+def live_league_html(league_id, entries, seen_version):
+    """Bloc HTML d'une ligue en direct ; les cartes modifiées depuis le dernier affichage de la session clignotent."""
+    items = []
+    for e in entries:
+        f, p = e['fixture'], e['probs']
+        flash = " live-flash" if e['version'] > seen_version else ""
+        items.append(
+            f"<a class='match-card{flash}' href='?match={f.id}' data-match='{f.id}'>"
+            f"<div style='display:flex; justify-content:space-around; align-items:center;'>"
+            f"<img src='{escape(f.home.logo, quote=True)}' width='40'>"
+            f"<span class='live-score'>{f.goals_home or 0} - {f.goals_away or 0}</span>"
+            f"<img src='{escape(f.away.logo, quote=True)}' width='40'></div>"
+            f"<div class='live-minute'>{live_minute(e)}</div>"
+            f"<p style='font-size:14px; font-weight:bold; margin:5px 0 0 0;'>{escape(f.home.name)} - {escape(f.away.name)}</p>"
+            f"<div class='live-probs'><span>1 <b>{p['home']}%</b></span><span>X <b>{p['draw']}%</b></span>"
+            f"<span>2 <b>{p['away']}%</b></span><span>+2.5 <b>{p['over25']}%</b></span></div></a>"
+        )
+    return f"<div class='league-header'>{TOP_LEAGUES.get(league_id, 'Compétition')}</div><div class='match-grid'>{''.join(items)}</div>"
 
 # --- MOTEUR CATALOGUE ---
-@st.cache_data(ttl=3600, show_spinner=False)
-def fetch_daily_catalog(date_str):
-    try:
-        r = requests.get(f"{BASE_URL}/fixtures", headers=HEADERS, params={"date": date_str, "timezone": "Europe/Paris"}, timeout=10).json()
-        fixtures = r.get('response', [])
-        valid_statuses = ['NS', 'TBD', 'PST']
-        filtered = [f for f in fixtures if f['league']['id'] in TOP_LEAGUES.keys() and f['fixture']['status']['short'] in valid_statuses]
-        filtered.sort(key=lambda x: x['fixture']['timestamp'])
-        return filtered
-    except: return []
-
-@st.cache_data(ttl=3600, show_spinner=False)
+# Couche HTTP + cache disque partagé dans sports_api ; st.cache_data sert de cache mémoire court
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_catalog_window(date_from, days):
+    return sports_api.fetch_catalog_window(date_from, days)
+
+# Cartes prêtes à afficher, recalculées seulement quand le catalogue est rechargé
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_catalog_cards(date_from, days):
+    return {day: [fixture_card(f) for f in fixtures] for day, fixtures in fetch_catalog_window(date_from, days).items()}
+
+@st.cache_data(ttl=300, show_spinner=False)
 def fetch_standings(league_id):
-    try:
-        # Calcule automatiquement la saison en cours
-        current_season = datetime.now().year if datetime.now().month >= 7 else datetime.now().year - 1
-        r = requests.get(f"{BASE_URL}/standings", headers=HEADERS, params={"league": league_id, "season": current_season}, timeout=10).json()
-        return r.get('response', [])
-    except: return []
+    return sports_api.fetch_standings(league_id)
+
+# Index team_id -> stats de toute la ligue, construit une fois par chargement du classement
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_team_index(league_id):
+    return build_team_index(fetch_standings(league_id))
+
+# Cotes : chargement groupé par date (OddsTable), le match view ne fait qu'une lecture d'index
+@st.cache_data(ttl=300, show_spinner=False)
+def fetch_odds_index(date_str):
+    return sports_api.fetch_odds_for_date(date_str)
 
+@st.cache_data(ttl=300, show_spinner=False)
 def get_match_odds(fixture_id):
-    if fixture_id:
-        try:
-            r = requests.get(f"{BASE_URL}/odds", headers=HEADERS, params={"fixture": fixture_id}, timeout=5).json()
-            if r.get('response'):
-                bets = r['response'][0]['bookmakers'][0]['bets'][0]['values']
-                return {b['value']: str(b['odd']) for b in bets}
-        except: pass
-    return {}
-
-@st.cache_data(ttl=3600, show_spinner=False)
+    return sports_api.get_match_odds(fixture_id)
+
+def lookup_match_odds(fixture):
+    odds = fetch_odds_index(fixture.day).get(fixture.id)
+    # Match absent du lot (cotes publiées après le chargement) : repli sur l'appel unitaire, lui aussi en cache
+    return odds if odds is not None else get_match_odds(fixture.id)
+
+@st.cache_data(ttl=300, show_spinner=False)
 def fetch_h2h(team_id_1, team_id_2):
-    try:
-        r = requests.get(f"{BASE_URL}/fixtures/headtohead", headers=HEADERS, params={"h2h": f"{team_id_1}-{team_id_2}", "last": 3}, timeout=5).json()
-        return r.get('response', [])
-    except: return []
-
-# --- CALCUL DES STATS ---
-def get_fallback_stats(team_name):
-    seed = int(hashlib.md5(team_name.encode()).hexdigest(), 16)
-    random.seed(seed)
-    if team_name in ["Real Madrid", "Manchester City", "Bayern Munich", "Liverpool", "Arsenal"]: atk, df = 90, 85
-    elif team_name in ["Paris Saint Germain", "Barcelona", "Inter", "Bayer Leverkusen", "Juventus"]: atk, df = 85, 82
-    elif team_name in ["AC Milan", "Tottenham", "Chelsea", "Manchester United", "Borussia Dortmund"]: atk, df = 81, 78
-    elif team_name in ["Marseille", "Lille", "Monaco", "Newcastle", "AS Roma", "Benfica", "Lens"]: atk, df = 77, 75
-    else: atk, df = 73, 72
-
-    return {'atk': atk + random.randint(-2, 2), 'def': df + random.randint(-2, 2), 'dyn': random.randint(65, 85), 'xg': round((atk / 100) * 2.2, 2), 'form_str': 'Non dispo', 'rank': '-', 'is_fallback': True}
-
-def calculate_true_stats(team_id, team_name, standings_data):
-    if not standings_data: return get_fallback_stats(team_name)
-    try:
-        standings_lists = standings_data[0]['league']['standings']
-        team_data = None
-        
-        # Fouille dans tous les groupes (indispensable pour les coupes d'Europe)
-        for group in standings_lists:
-            team_data = next((t for t in group if t['team']['id'] == team_id), None)
-            if team_data: break
-            
-        if team_data and team_data['all']['played'] > 0:
-            played = team_data['all']['played']
-            goals_for = team_data['all']['goals']['for']
-            goals_against = team_data['all']['goals']['against']
-            form = team_data.get('form', '')
-            
-            avg_gf = goals_for / played
-            avg_ga = goals_against / played
-            
-            stats = {}
-            stats['atk'] = min(100, int((avg_gf / 2.5) * 100))
-            stats['def'] = max(10, min(100, int(100 - ((avg_ga / 2.0) * 100))))
-            stats['xg'] = round(avg_gf, 2)
-            stats['form_str'] = form
-            stats['rank'] = team_data.get('rank', '-')
-            stats['dyn'] = int((sum([3 if r == 'W' else 1 if r == 'D' else 0 for r in form]) / (len(form) * 3)) * 100) if form else 70
-            stats['is_fallback'] = False
-            return stats
-    except: pass
-    return get_fallback_stats(team_name)
-
-def calculate_probabilities(stats_h, stats_a):
-    power_h = stats_h['atk'] + stats_h['def'] + stats_h['dyn'] + 10
-    power_a = stats_a['atk'] + stats_a['def'] + stats_a['dyn']
-    if power_h == 0 and power_a == 0: return 33, 34, 33 
-    
-    diff = power_h - power_a
-    prob_h = max(5, min(90, int(45 + (diff * 0.4))))
-    prob_a = max(5, min(90, int(30 - (diff * 0.4))))
-    return prob_h, 100 - prob_h - prob_a, prob_a
-
-def detect_value_bet(prob_h, prob_n, prob_a, odds_dict, home_name, away_name):
-    value_msg = ""
-    try:
-        odd_h = float(odds_dict.get('Home', 0))
-        odd_d = float(odds_dict.get('Draw', 0))
-        odd_a = float(odds_dict.get('Away', 0))
-        
-        if odd_h > 0 and odd_h * (prob_h / 100) > 1.05:
-            value_msg = f"🔥 VALUE BET DÉTECTÉE : VICTOIRE {home_name.upper()} (Cote {odd_h:.2f})"
-        elif odd_a > 0 and odd_a * (prob_a / 100) > 1.05:
-            value_msg = f"🔥 VALUE BET DÉTECTÉE : VICTOIRE {away_name.upper()} (Cote {odd_a:.2f})"
-        elif odd_d > 0 and odd_d * (prob_n / 100) > 1.10:
-            value_msg = f"🔥 VALUE BET DÉTECTÉE : MATCH NUL (Cote {odd_d:.2f})"
-    except: pass
-    return value_msg
-
-def get_ai_prediction(home, away, stats_h, stats_a, odds, value_msg, h2h_data):
-    client = Groq(api_key=GROQ_KEY)
-    h2h_text = "Historique récent : " + ", ".join([f"{f['teams']['home']['name']} {f['goals']['home']}-{f['goals']['away']} {f['teams']['away']['name']}" for f in h2h_data]) if h2h_data else "Pas d'historique."
-
-    prompt = f"""Tu es un algorithme de prédiction mathématique de paris sportifs.
-    Analyse ce match : {home} vs {away}.
-    
-    DATA :
-    - {home} (Dom) : Classement: {stats_h['rank']}, Attaque {stats_h['atk']}/100, Défense {stats_h['def']}/100, Forme {stats_h['dyn']}/100, Buts/match {stats_h['xg']}.
-    - {away} (Ext) : Classement: {stats_a['rank']}, Attaque {stats_a['atk']}/100, Défense {stats_a['def']}/100, Forme {stats_a['dyn']}/100, Buts/match {stats_a['xg']}.
-    {h2h_text}
-    
-    COTES ACTUELLES : 1 ({odds.get('Home', '-')}) | X ({odds.get('Draw', '-')}) | 2 ({odds.get('Away', '-')})
-    Mathématiques : {value_msg if value_msg else "Pas de Value flagrante sur le résultat sec."}
-    
-    CONSIGNES :
-    1. Base-toi sur les stats, l'historique et l'enjeu (classement).
-    2. Sois direct, factuel et précis. Pas de blabla.
-    3. VARIE TES PROPOSITIONS d'un match à l'autre.
-
-    DONNE 3 CHOIX DE PARIS :
-    1. 🟢 PARI SAFE : Un pari hyper probable (Double Chance, Over/Under, etc.). Justifie.
-    2. 🟡 PARI AUDACIEUX : Une cote intéressante appuyée par la stat dominante (Handicap, Buteur probable, Mi-temps...).
-    3. 🔴 COUP DE POKER : Score exact ou scénario pointu basé sur la data.
-    """
-    chat = client.chat.completions.create(model="llama-3.3-70b-versatile", messages=[{"role": "user", "content": prompt}], temperature=0.5)
-    return chat.choices[0].message.content
+    return sports_api.fetch_h2h(team_id_1, team_id_2)
+
+# Scanner de value bets : un thread par processus, démarré à la première ouverture de l'onglet.
+# Il ne lit que le cache disque ; l'onglet ne lit que le dernier résultat
+@st.cache_resource(show_spinner=False)
+def get_value_scanner():
+    return ValueScanner(days=sports_api.CATALOG_DAYS).start()
+
+# Endpoint Prometheus /metrics si METRICS_PORT est défini, une fois par processus
+@st.cache_resource(show_spinner=False)
+def get_metrics_server():
+    return metrics.start_http_server() if metrics.METRICS_PORT else None
+
+# Préchauffage des caches (48-72h à venir) en tâche de fond, une fois par processus
+@st.cache_resource(show_spinner=False)
+def get_prefetcher():
+    return prefetch.Prefetcher().start() if prefetch.IN_APP else None
+
+# Direct : un poller par processus, partagé par toutes les sessions (il dort sans spectateur)
+@st.cache_resource(show_spinner=False)
+def get_live_board():
+    return live.LiveBoard().start()
 
 # --- INTERFACE ---
-def render_match_grid(matches, show_date=False):
-    if not matches:
+# Clic sur une carte [data-match] : sélection renvoyée à Python sans navigation, la session (onglet,
+# page, style) est conservée. Ctrl/Cmd-clic et clic milieu suivent toujours le lien ?match=.
+MATCH_PICKER_JS = """
+export default function(component) {
+    const { data, setTriggerValue, parentElement } = component;
+    let root = parentElement.querySelector(':scope > .match-picker');
+    if (!root) {
+        root = document.createElement('div');
+        root.className = 'match-picker';
+        parentElement.appendChild(root);
+    }
+    root.innerHTML = data;
+    root.onclick = (e) => {
+        const card = e.target.closest('a[data-match]');
+        if (!card || e.button !== 0 || e.ctrlKey || e.metaKey || e.shiftKey || e.altKey) return;
+        e.preventDefault();
+        setTriggerValue('selected', Number(card.dataset.match));
+    };
+}
+"""
+
+# Déclaré à chaque exécution du script : le registre est propre au runtime, une définition identique
+# y est simplement remplacée
+MATCH_PICKER = st.components.v2.component("match_picker", js=MATCH_PICKER_JS, isolate_styles=False)
+
+def match_picker(html, key):
+    """Monte un bloc de cartes ; le clic ouvre l'analyse dans la session courante (rerun de toute l'app,
+    y compris depuis un fragment)."""
+    selected = MATCH_PICKER(key=key, data=html, on_selected_change=lambda: None).selected
+    if selected and open_match(selected):
+        # Un ancien ?match= de l'URL ne doit pas reprendre la main au rerun suivant
+        st.query_params.pop("match", None)
+        st.rerun()
+
+def render_radar(series, theta):
+    """Radar attaque / défense / forme ; series = [(stats, nom, couleur), ...]."""
+    # Plotly importé à la première vue qui affiche un radar, pas au démarrage de l'app
+    import plotly.graph_objects as go
+    fig = go.Figure()
+    for stats, name, color in series:
+        fig.add_trace(go.Scatterpolar(
+            r=[stats['atk'], stats['def'], stats['dyn'], 50, stats['atk']],
+            theta=theta, fill='toself', line_color=color, name=name
+        ))
+    fig.update_layout(template="plotly_dark", polar=dict(radialaxis=dict(visible=False)), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20, b=20))
+    st.plotly_chart(fig, use_container_width=True)
+
+def render_match_grid(cards, key, show_date=False):
+    if not cards:
         st.info("Aucun match majeur programmé pour cette période.")
         return
 
-    matches_by_league = {}
-    for m in matches:
-        lid = m['league']['id']
-        if lid not in matches_by_league: matches_by_league[lid] = []
-        matches_by_league[lid].append(m)
-
-    for lid, league_matches in matches_by_league.items():
-        league_name = TOP_LEAGUES.get(lid, "Compétition")
-        st.markdown(f"<div class='league-header'>{league_name}</div>", unsafe_allow_html=True)
-        
-        cols = st.columns(3)
-        for i, f in enumerate(league_matches):
-            with cols[i % 3]:
-                time_str = datetime.fromisoformat(f['fixture']['date'].replace('Z','+00:00')).strftime('%d/%m - %H:%M') if show_date else datetime.fromisoformat(f['fixture']['date'].replace('Z','+00:00')).strftime('%H:%M')
-                st.markdown(f"""
-                    <div class='match-card'>
-                        <div style="display:flex; justify-content:space-around; align-items:center; margin-bottom:15px;">
-                            <img src="{f['teams']['home']['logo']}" width="45">
-                            <span style="font-weight:bold; color:#8892b0; font-size:12px; background:#1a1c23; padding:4px 8px; border-radius:5px;">{time_str}</span>
-                            <img src="{f['teams']['away']['logo']}" width="45">
+    # Regroupement par ligue (ordre de première apparition), pagination sur la liste à plat
+    by_league = {}
+    for c in cards: by_league.setdefault(c['league_id'], []).append(c)
+    ordered = [c for league_cards in by_league.values() for c in league_cards]
+    pages = -(-len(ordered) // CARDS_PER_PAGE)
+
+    grid = st.container()
+    page = 1
+    if pages > 1:
+        page = st.radio("Page", range(1, pages + 1), horizontal=True, key=f"page_{key}",
+                        format_func=lambda p: f"Page {p}", label_visibility="collapsed")
+    shown = ordered[(page - 1) * CARDS_PER_PAGE:page * CARDS_PER_PAGE]
+    with grid:
+        match_picker("".join(league_html(lid, list(league_cards), show_date)
+                             for lid, league_cards in groupby(shown, key=lambda c: c['league_id'])), f"picker_{key}")
+
+# Relit le relevé partagé (aucun appel API) : seul ce fragment se redessine
+@st.fragment(run_every=15)
+def render_live_board():
+    board = get_live_board()
+    board.touch()
+    board.ensure_polled()
+    version, entries = board.snapshot()
+    if not entries:
+        st.info("Connexion au direct..." if board.polled_at is None else "Aucun match en cours dans les compétitions suivies.")
+        return
+    by_league = {}
+    for e in entries: by_league.setdefault(e['fixture'].league_id, []).append(e)
+    seen = st.session_state.get('live_seen', version)
+    match_picker("".join(live_league_html(lid, league_entries, seen) for lid, league_entries in by_league.items()), "picker_live")
+    st.session_state.live_seen = version
+
+@st.fragment(run_every=15)
+def render_live_strip(fix_id):
+    entry = get_live_board().entry(fix_id)
+    if entry is None: return
+    get_live_board().touch()
+    f, p = entry['fixture'], entry['probs']
+    st.markdown(f"""
+        <div style='text-align:center; margin-bottom:20px;'>
+            <span class='live-minute'>🔴 EN DIRECT · {live_minute(entry)}</span><br>
+            <span class='live-score'>{f.goals_home or 0} - {f.goals_away or 0}</span>
+            <div class='live-probs' style='max-width:500px; margin:10px auto;'>
+                <span>1 <b>{p['home']}%</b></span><span>X <b>{p['draw']}%</b></span><span>2 <b>{p['away']}%</b></span>
+                <span>+2.5 <b>{p['over25']}%</b></span><span>BTTS <b>{p['btts']}%</b></span>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+
+def render_value_table():
+    df, scanned_at = get_value_scanner().latest()
+    if df is None:
+        st.info("Premier scan du catalogue en cours, reviens dans quelques secondes.")
+        return
+    st.markdown(f"<p style='color:#8892b0; font-size:13px;'>Dernier scan : {scanned_at.strftime('%H:%M')} — {df['fixture_id'].nunique()} matchs analysés.</p>", unsafe_allow_html=True)
+    edges = df[df['ev'] > 0]
+    if edges.empty:
+        st.info("Aucune cote au-dessus des probabilités du modèle pour le moment.")
+        return
+    table = edges.assign(
+        kickoff=edges['kickoff'].str[5:16].str.replace('T', ' '),
+        market=edges['market'].map({'Home': '1', 'Draw': 'X', 'Away': '2', 'Over 2.5': '+2.5 buts', 'Yes': 'BTTS'}),
+        prob=(edges['prob'] * 100).round(1),
+        fair=(edges['fair'] * 100).round(1),
+        ev=(edges['ev'] * 100).round(1),
+    )[['kickoff', 'league', 'home', 'away', 'market', 'odd', 'books', 'prob', 'fair', 'ev', 'value']]
+    st.dataframe(table, hide_index=True, width="stretch", column_config={
+        'kickoff': 'Date', 'league': 'Compétition', 'home': 'Domicile', 'away': 'Extérieur', 'market': 'Issue',
+        'odd': st.column_config.NumberColumn('Meilleure cote', format="%.2f"),
+        'books': st.column_config.NumberColumn('Bookmakers'),
+        'prob': st.column_config.NumberColumn('Proba modèle %', format="%.1f"),
+        'fair': st.column_config.NumberColumn('Proba marché %', format="%.1f", help="Consensus des bookmakers, marge retirée"),
+        'ev': st.column_config.NumberColumn('EV %', format="%+.1f"),
+        'value': 'Value',
+    })
+
+# Panneau cotes / value bet / IA : fragment à rerun partiel.
+# Modifier une cote ne relance que cette fonction, le contexte du match est lu en session.
+@st.fragment
+def render_odds_panel():
+    metrics.inc("fragment_runs_total", fragment="odds_panel")
+    ctx = st.session_state.match_ctx
+    h, a, fix_id = ctx['home'], ctx['away'], ctx['fix_id']
+    prob_h, prob_n, prob_a = ctx['probs']
+    api_odds = ctx['api_odds']
+
+    st.markdown("### 🎲 COTES DU MATCH (Ajustables)")
+    st.markdown("<p style='color:#8892b0; font-size:13px;'>Les meilleures cotes du marché sont pré-remplies. Modifie-les avec tes propres cotes pour recalculer la Value Bet mathématique avant d'interroger l'IA.</p>", unsafe_allow_html=True)
+    
+    c_odd1, c_odd2, c_odd3 = st.columns(3)
+    # Meilleure cote du marché par défaut, 0 si l'API n'a rien
+    best = api_odds.get('best', {})
+    val_h, val_d, val_a = (best.get(o, 0.0) for o in ('Home', 'Draw', 'Away'))
+    
+    man_odd_h = c_odd1.number_input(f"Victoire {h}", value=val_h, min_value=0.0, step=0.05, format="%.2f", key=f"man_odd_h_{fix_id}")
+    man_odd_d = c_odd2.number_input(f"Match Nul", value=val_d, min_value=0.0, step=0.05, format="%.2f", key=f"man_odd_d_{fix_id}")
+    man_odd_a = c_odd3.number_input(f"Victoire {a}", value=val_a, min_value=0.0, step=0.05, format="%.2f", key=f"man_odd_a_{fix_id}")
+    
+    final_odds = {
+        'Home': f"{man_odd_h:.2f}",
+        'Draw': f"{man_odd_d:.2f}",
+        'Away': f"{man_odd_a:.2f}"
+    }
+    
+    fair = api_odds.get('fair', {})
+    if all(o in fair for o in ('Home', 'Draw', 'Away')):
+        st.markdown(f"<p style='color:#8892b0; font-size:13px; text-align:center;'>Marché sans marge ({api_odds['books']} bookmakers, "
+                    f"marge moyenne {api_odds['margin'].get('1X2', 0):.1%}) : 1 {fair['Home']:.0%} · X {fair['Draw']:.0%} · 2 {fair['Away']:.0%}</p>",
+                    unsafe_allow_html=True)
+
+    value_alert = detect_value_bet(prob_h, prob_n, prob_a, final_odds, h, a, fair=fair)
+    if value_alert:
+        st.markdown(f"<div class='value-badge'>{value_alert}</div>", unsafe_allow_html=True)
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    if st.button("LANCER L'ANALYSE MATHÉMATIQUE", use_container_width=False):
+        # Streaming : le texte s'affiche au fil des tokens (instantané si déjà en cache)
+        box = st.empty()
+        prediction = ""
+        try:
+            with st.spinner("Llama-3.3 croise les nouvelles cotes avec les datas..."):
+                for part in oracle.stream_prediction(h, a, ctx['stats_h'], ctx['stats_a'], final_odds, value_alert, ctx['h2h']):
+                    prediction += part
+                    box.markdown(f"""
+                        <div style='background:#11141b; padding:30px; border-radius:15px; border:1px solid #00ff88; font-size:15px; line-height:1.7;'>
+                            {prediction}
                         </div>
-                        <p style='font-size:15px; font-weight:bold; margin:0;'>{f['teams']['home']['name']}<br><span style="color:#2d303e; font-size:12px;">VS</span><br>{f['teams']['away']['name']}</p>
-                    </div>
-                """, unsafe_allow_html=True)
-                if st.button("ANALYSER LE MATCH", key=f"btn_{f['fixture']['id']}"):
-                    st.session_state.match_data = f
-                    st.session_state.view = 'match'
-                    st.rerun()
+                    """, unsafe_allow_html=True)
+        except oracle.OracleBusy as e:
+            st.warning(str(e))
+
+def find_fixture(fix_id):
+    catalog = fetch_catalog_window(datetime.now().strftime("%Y-%m-%d"), sports_api.CATALOG_DAYS)
+    fixture = next((f for day in catalog.values() for f in day if f.id == fix_id), None)
+    if fixture is None:
+        # Match commencé : il a quitté le catalogue mais figure dans le relevé du direct
+        entry = get_live_board().entry(fix_id)
+        fixture = entry['fixture'] if entry else None
+    return fixture
+
+def open_match(fix_id):
+    """Ouvre l'analyse d'un match de la fenêtre ; False s'il est introuvable."""
+    fixture = find_fixture(fix_id) if fix_id else None
+    if fixture is None: return False
+    st.session_state.match_data = fixture
+    st.session_state.view = 'match'
+    return True
+
+def open_match_from_link():
+    """?match=<id> (lien partagé, nouvel onglet) : ouvre l'analyse si le match est dans la fenêtre."""
+    param = st.query_params.get("match")
+    if not param or not param.isdigit(): return
+    current = st.session_state.get('match_data')
+    if current and current.id == int(param): return
+    if not open_match(int(param)): del st.query_params["match"]
+
+get_prefetcher()
+get_metrics_server()
+open_match_from_link()
+_render_view = st.session_state.view  # un lien ?match= a pu changer de vue
+
+# Mode dégradé signalé explicitement plutôt que des pages vides
+api_state = sports_api.api_status()
+if api_state['degraded']:
+    st.warning(f"⚠️ MODE DÉGRADÉ : {api_state['reason']}. Les données affichées peuvent dater ou être incomplètes.")
+
+def render_admin_panel():
+    st.markdown("<hr style='border-color:#2d303e;'>", unsafe_allow_html=True)
+    with st.expander("🛠️ ADMIN — MÉTRIQUES DU PROCESSUS"):
+        cache_stats = sports_api.get_cache().stats()['total']
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Appels API", sports_api.network_calls())
+        c2.metric("Hit ratio cache", f"{cache_stats['hit_ratio']:.0%}")
+        c3.metric("Requêtes coalescées", api_state['coalesced'])
+        c4.metric("Reruns (session)", st.session_state.reruns)
+        st.dataframe(metrics.timings_table(), hide_index=True, width="stretch")
+        st.code(metrics.render(), language="text")
 
 # --- VUE 1 : LE CATALOGUE ---
 if st.session_state.view == 'home':
@@ -283,64 +474,89 @@ if st.session_state.view == 'home':
     date_after = date_today + timedelta(days=2)
 
     with st.spinner("Synchronisation des vitrines de matchs..."):
-        matches_today = fetch_daily_catalog(date_today.strftime("%Y-%m-%d"))
-        matches_tmrw = fetch_daily_catalog(date_tmrw.strftime("%Y-%m-%d"))
-        matches_after = fetch_daily_catalog(date_after.strftime("%Y-%m-%d"))
+        # Aujourd'hui + 2 jours en un seul chargement parallèle
+        catalog = fetch_catalog_cards(date_today.strftime("%Y-%m-%d"), sports_api.CATALOG_DAYS)
+        matches_today = catalog[date_today.strftime("%Y-%m-%d")]
+        matches_tmrw = catalog[date_tmrw.strftime("%Y-%m-%d")]
+        matches_after = catalog[date_after.strftime("%Y-%m-%d")]
 
     upcoming_matches = matches_tmrw + matches_after
 
-    t1, t2 = st.tabs(["🔥 GROSSES AFFICHES (À VENIR)", "📅 MATCHS DU JOUR"])
+    # Onglets à état : seul l'onglet affiché est calculé, les autres le sont au clic
+    t1, t2, t3, t4 = st.tabs(["🔥 GROSSES AFFICHES (À VENIR)", "📅 MATCHS DU JOUR", "🔴 EN DIRECT", "💎 VALUE BETS"],
+                             key="home_tab", on_change="rerun")
 
     with t1:
-        render_match_grid(upcoming_matches, show_date=True)
-        
+        if t1.open: render_match_grid(upcoming_matches, "upcoming", show_date=True)
+
     with t2:
-        render_match_grid(matches_today, show_date=False)
+        if t2.open: render_match_grid(matches_today, "today", show_date=False)
+
+    with t3:
+        if t3.open: render_live_board()
+
+    with t4:
+        if t4.open: render_value_table()
 
 # --- VUE 2 : ANALYSE ---
 elif st.session_state.view == 'match':
     m = st.session_state.match_data
-    h, a = m['teams']['home']['name'], m['teams']['away']['name']
-    h_id, a_id = m['teams']['home']['id'], m['teams']['away']['id']
-    fix_id = m['fixture']['id']
-    league_id = m['league']['id']
+    h, a = m.home.name, m.away.name
+    h_id, a_id = m.home.id, m.away.id
+    fix_id = m.id
+    league_id = m.league_id
     
     col_btn, _ = st.columns([1, 5])
     with col_btn:
         st.markdown("<div class='btn-back'>", unsafe_allow_html=True)
         if st.button("🔙 RETOUR CATALOGUE"):
             st.session_state.view = 'home'
+            st.session_state.pop('match_ctx', None)
+            st.query_params.pop("match", None)
             st.rerun()
         st.markdown("</div>", unsafe_allow_html=True)
 
-    with st.spinner("Extraction des mathématiques et historiques..."):
-        standings = fetch_standings(league_id)
-        stats_h = calculate_true_stats(h_id, h, standings)
-        stats_a = calculate_true_stats(a_id, a, standings)
-        prob_h, prob_n, prob_a = calculate_probabilities(stats_h, stats_a)
-        prob_o25, prob_btts = calculate_goals_probabilities(stats_h['xg'], stats_a['xg'])
-        api_odds = get_match_odds(fix_id)
-        h2h = fetch_h2h(h_id, a_id)
-        
-        est_badge = " <span style='font-size:12px; color:#8892b0; font-weight:normal;'>(Stats Estimées)</span>" if stats_h.get('is_fallback') else ""
+    # Contexte calculé une fois par match et gardé en session (lu par le fragment des cotes)
+    ctx = st.session_state.get('match_ctx')
+    if not ctx or ctx['fix_id'] != fix_id:
+        with st.spinner("Extraction des mathématiques et historiques..."):
+            team_index = fetch_team_index(league_id)
+            stats_h = calculate_true_stats(h_id, h, team_index)
+            stats_a = calculate_true_stats(a_id, a, team_index)
+            ctx = {
+                'fix_id': fix_id, 'home': h, 'away': a,
+                'stats_h': stats_h, 'stats_a': stats_a,
+                'probs': calculate_probabilities(stats_h, stats_a),
+                'goals': calculate_goals_probabilities(stats_h['xg'], stats_a['xg']),
+                'api_odds': lookup_match_odds(m),
+                'h2h': fetch_h2h(h_id, a_id),
+            }
+        st.session_state.match_ctx = ctx
+
+    stats_h, stats_a, h2h = ctx['stats_h'], ctx['stats_a'], ctx['h2h']
+    prob_h, prob_n, prob_a = ctx['probs']
+    prob_o25, prob_btts = ctx['goals']
+    est_badge = " <span style='font-size:12px; color:#8892b0; font-weight:normal;'>(Stats Estimées)</span>" if stats_h.get('is_fallback') else ""
+
+    if get_live_board().entry(fix_id): render_live_strip(fix_id)
 
     st.markdown(f"""
         <div style='text-align:center; padding:30px; border-bottom:1px solid #2d303e; margin-bottom:20px;'>
-            <img src="{m['teams']['home']['logo']}" width="60" style="vertical-align:middle; margin-right:20px;">
+            <img src="{m.home.logo}" width="60" style="vertical-align:middle; margin-right:20px;">
             <span style='font-size:35px; font-weight:900; color:white; vertical-align:middle;'>{h} vs {a}</span>
-            <img src="{m['teams']['away']['logo']}" width="60" style="vertical-align:middle; margin-left:20px;">
+            <img src="{m.away.logo}" width="60" style="vertical-align:middle; margin-left:20px;">
         </div>
     """, unsafe_allow_html=True)
     
     col_t1, col_t2 = st.columns(2)
     with col_t1:
         if st.button(f"🔍 VOIR LE PROFIL DE {h.upper()} (Class: {stats_h['rank']})", key="btn_team1"):
-            st.session_state.team_data = {'id': h_id, 'name': h, 'logo': m['teams']['home']['logo'], 'stats': stats_h}
+            st.session_state.team_data = {'team': m.home, 'stats': stats_h}
             st.session_state.view = 'team_profile'
             st.rerun()
     with col_t2:
         if st.button(f"🔍 VOIR LE PROFIL DE {a.upper()} (Class: {stats_a['rank']})", key="btn_team2"):
-            st.session_state.team_data = {'id': a_id, 'name': a, 'logo': m['teams']['away']['logo'], 'stats': stats_a}
+            st.session_state.team_data = {'team': m.away, 'stats': stats_a}
             st.session_state.view = 'team_profile'
             st.rerun()
             
@@ -349,57 +565,18 @@ elif st.session_state.view == 'match':
     t1, t2 = st.tabs(["🧠 L'ORACLE (PRONOSTICS)", "📊 DATA MATRICES"])
     
     with t1:
-        st.markdown("### 🎲 COTES DU MATCH (Ajustables)")
-        st.markdown("<p style='color:#8892b0; font-size:13px;'>Les cotes de l'API sont pré-remplies. Modifie-les avec tes propres cotes pour recalculer la Value Bet mathématique avant d'interroger l'IA.</p>", unsafe_allow_html=True)
-        
-        c_odd1, c_odd2, c_odd3 = st.columns(3)
-        # Gestion propre des valeurs par défaut si l'API est vide
-        val_h = float(api_odds['Home']) if api_odds.get('Home') else 0.0
-        val_d = float(api_odds['Draw']) if api_odds.get('Draw') else 0.0
-        val_a = float(api_odds['Away']) if api_odds.get('Away') else 0.0
-        
-        man_odd_h = c_odd1.number_input(f"Victoire {h}", value=val_h, min_value=0.0, step=0.05, format="%.2f")
-        man_odd_d = c_odd2.number_input(f"Match Nul", value=val_d, min_value=0.0, step=0.05, format="%.2f")
-        man_odd_a = c_odd3.number_input(f"Victoire {a}", value=val_a, min_value=0.0, step=0.05, format="%.2f")
-        
-        final_odds = {
-            'Home': f"{man_odd_h:.2f}",
-            'Draw': f"{man_odd_d:.2f}",
-            'Away': f"{man_odd_a:.2f}"
-        }
-        
-        value_alert = detect_value_bet(prob_h, prob_n, prob_a, final_odds, h, a)
-        if value_alert:
-            st.markdown(f"<div class='value-badge'>{value_alert}</div>", unsafe_allow_html=True)
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-        if st.button("LANCER L'ANALYSE MATHÉMATIQUE", use_container_width=False):
-            with st.spinner("Llama-3.3 croise les nouvelles cotes avec les datas..."):
-                prediction = get_ai_prediction(h, a, stats_h, stats_a, final_odds, value_alert, h2h)
-                st.markdown(f"""
-                    <div style='background:#11141b; padding:30px; border-radius:15px; border:1px solid #00ff88; font-size:15px; line-height:1.7;'>
-                        {prediction}
-                    </div>
-                """, unsafe_allow_html=True)
+        render_odds_panel()
 
     with t2:
         col_rad, col_stat = st.columns(2)
         with col_rad:
-            fig = go.Figure(go.Scatterpolar(
-                r=[stats_h['atk'], stats_h['def'], stats_h['dyn'], 50, stats_h['atk']], 
-                theta=['Attaque','Défense','Forme','Structure','Attaque'], fill='toself', line_color='#00ff88', name=h
-            ))
-            fig.add_trace(go.Scatterpolar(
-                r=[stats_a['atk'], stats_a['def'], stats_a['dyn'], 50, stats_a['atk']], 
-                theta=['Attaque','Défense','Forme','Structure','Attaque'], fill='toself', line_color='#60efff', name=a
-            ))
-            fig.update_layout(template="plotly_dark", polar=dict(radialaxis=dict(visible=False)), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20, b=20))
-            st.plotly_chart(fig, use_container_width=True)
+            with metrics.timer("block_render_seconds", block="radar_match"):
+                render_radar([(stats_h, h, '#00ff88'), (stats_a, a, '#60efff')], ['Attaque','Défense','Forme','Structure','Attaque'])
             
             if h2h:
                 st.markdown("<p style='color:#60efff; font-weight:bold; margin-top:10px; text-align:center;'>HISTORIQUE DES CONFRONTATIONS</p>", unsafe_allow_html=True)
                 for f in h2h:
-                    st.markdown(f"<div class='h2h-box'>{f['teams']['home']['name']} <b>{f['goals']['home']} - {f['goals']['away']}</b> {f['teams']['away']['name']}</div>", unsafe_allow_html=True)
+                    st.markdown(f"<div class='h2h-box'>{f.home.name} <b>{f.goals_home} - {f.goals_away}</b> {f.away.name}</div>", unsafe_allow_html=True)
 
         with col_stat:
             st.markdown(f"### 🎯 MATRICE DE VICTOIRE {est_badge}", unsafe_allow_html=True)
@@ -421,11 +598,11 @@ elif st.session_state.view == 'match':
             
             st.markdown("<hr style='border-color:#2d303e;'>", unsafe_allow_html=True)
             
-            metrics = [
+            comparisons = [
                 ("Moy. Buts / Match", str(stats_h['xg']), str(stats_a['xg'])), 
                 ("Série en cours", format_form(stats_h['form_str']), format_form(stats_a['form_str']))
             ]
-            for label, v1, v2 in metrics:
+            for label, v1, v2 in comparisons:
                 st.markdown(f"""
                     <div style='display:flex; justify-content:space-between; padding:10px 0; border-bottom:1px solid #1a1c23;'>
                         <span style='color:#00ff88; font-weight:bold; font-size:15px;'>{v1}</span>
@@ -437,6 +614,7 @@ elif st.session_state.view == 'match':
 # --- VUE 3 : PROFIL D'ÉQUIPE ---
 elif st.session_state.view == 'team_profile':
     t = st.session_state.team_data
+    team = t['team']
     
     col_btn, _ = st.columns([1, 5])
     with col_btn:
@@ -448,20 +626,16 @@ elif st.session_state.view == 'team_profile':
 
     st.markdown(f"""
         <div style='text-align:center; padding:30px; margin-bottom:20px;'>
-            <img src="{t['logo']}" width="100">
-            <h1 style='margin-top:15px; color:white;'>{t['name'].upper()}</h1>
+            <img src="{team.logo}" width="100">
+            <h1 style='margin-top:15px; color:white;'>{team.name.upper()}</h1>
         </div>
     """, unsafe_allow_html=True)
 
     col_rad, col_stat = st.columns(2)
     
     with col_rad:
-        fig = go.Figure(go.Scatterpolar(
-            r=[t['stats']['atk'], t['stats']['def'], t['stats']['dyn'], 50, t['stats']['atk']], 
-            theta=['Attaque','Défense','Forme Globale','Structure','Attaque'], fill='toself', line_color='#00ff88', name=t['name']
-        ))
-        fig.update_layout(template="plotly_dark", polar=dict(radialaxis=dict(visible=False)), paper_bgcolor='rgba(0,0,0,0)', margin=dict(t=20, b=20))
-        st.plotly_chart(fig, use_container_width=True)
+        with metrics.timer("block_render_seconds", block="radar_team"):
+            render_radar([(t['stats'], team.name, '#00ff88')], ['Attaque','Défense','Forme Globale','Structure','Attaque'])
 
     with col_stat:
         st.markdown("<br>", unsafe_allow_html=True)
@@ -501,3 +675,9 @@ elif st.session_state.view == 'team_profile':
                 <span style='color:#00ff88; font-weight:bold; float:right;'>{t['stats']['dyn']} / 100</span>
             </div>
         """, unsafe_allow_html=True)
+
+metrics.observe("view_render_seconds", time.perf_counter() - _render_t0, view=_render_view)
+
+# Panneau admin : ?admin=<ADMIN_TOKEN>
+if settings['admin_token'] and st.query_params.get("admin") == settings['admin_token']:
+    render_admin_panel()
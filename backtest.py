@@ -0,0 +1,261 @@
+"""Backtest historique du modèle de prédiction.
+
+1. `ingest` : matchs terminés + dernières cotes connues (clôture) par ligue/saison,
+   stockés en Parquet dans BACKTEST_DIR (un fichier par ligue, saison et type).
+2. `run` : rejoue le modèle sur ces matchs avec les stats *avant* chaque match
+   (reconstituées comme le classement API : moyennes de buts, forme sur 5 matchs),
+   en NumPy/pandas, une partition (ligue, saison) par processus.
+3. rapport par marché : Brier, log-loss, calibration et ROI simulé des value bets.
+
+    python backtest.py ingest --seasons 2022 2023
+    python backtest.py run --seasons 2023 --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import sports_api
+from governor import ApiError
+from model import GOALS_VALUE_THRESHOLD, VALUE_THRESHOLDS, get_fallback_stats, market_fair, probabilities_from_power, value_flags
+from odds import parse_odds
+from score_matrix import goal_markets
+
+BACKTEST_DIR = os.environ.get(
+    "BACKTEST_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "history")
+)
+CALIBRATION_BINS = np.linspace(0, 1, 11)
+
+
+def _path(kind, league_id, season):
+    return os.path.join(BACKTEST_DIR, f"{kind}_{league_id}_{season}.parquet")
+
+
+# --- INGESTION ---
+def _paged(endpoint, params):
+    first = sports_api.api_get(endpoint, {**params, "page": 1}, cache=False)
+    items = list(first.get('response', []))
+    for page in range(2, (first.get('paging') or {}).get('total', 1) + 1):
+        items.extend(sports_api.api_get(endpoint, {**params, "page": page}, cache=False).get('response', []))
+    return items
+
+
+def fixtures_frame(items):
+    rows = []
+    for f in items:
+        if f['fixture']['status']['short'] not in sports_api.FINISHED_STATUSES: continue
+        # Score à 90 minutes : c'est ce que le modèle et les cotes 1X2 visent
+        ft = (f.get('score') or {}).get('fulltime') or f['goals']
+        if ft.get('home') is None or ft.get('away') is None: continue
+        rows.append((f['fixture']['id'], f['fixture']['timestamp'], f['league']['id'], f['league']['season'],
+                     f['teams']['home']['id'], f['teams']['home']['name'], f['teams']['away']['id'], f['teams']['away']['name'],
+                     ft['home'], ft['away']))
+    return pd.DataFrame(rows, columns=['fixture_id', 'ts', 'league_id', 'season', 'home_id', 'home', 'away_id', 'away',
+                                       'goals_home', 'goals_away'])
+
+
+ODDS_OUTCOMES = {'home': 'Home', 'draw': 'Draw', 'away': 'Away', 'over25': 'Over 2.5', 'btts': 'Yes'}
+ODDS_COLUMNS = [f"{kind}_{name}" for kind in ('odd', 'fair') for name in ODDS_OUTCOMES]
+
+
+def odds_frame(items):
+    """Meilleure cote (odd_*) et proba sans marge du consensus (fair_*) par match, tous bookmakers."""
+    table = parse_odds(items)
+    ids = table.fixture_ids
+    df = pd.DataFrame({'fixture_id': ids})
+    for kind, field in (('odd', 'best'), ('fair', 'fair')):
+        values = table.lookup(ids, field, tuple(ODDS_OUTCOMES.values()))
+        for j, name in enumerate(ODDS_OUTCOMES):
+            df[f"{kind}_{name}"] = values[:, j]
+    return df
+
+
+def ingest(league_id, season):
+    os.makedirs(BACKTEST_DIR, exist_ok=True)
+    fixtures = fixtures_frame(sports_api.api_get(
+        "/fixtures", {"league": league_id, "season": season, "status": "-".join(sports_api.FINISHED_STATUSES)}, timeout=30, cache=False
+    ).get('response', []))
+    odds = odds_frame(_paged("/odds", {"league": league_id, "season": season}))
+    fixtures.to_parquet(_path("fixtures", league_id, season), index=False)
+    odds.to_parquet(_path("odds", league_id, season), index=False)
+    return len(fixtures), len(odds)
+
+
+# --- REJEU DU MODÈLE ---
+def pre_match_features(fixtures):
+    """Stats de chaque équipe avant chaque match, calculées comme team_record() sur le classement."""
+    n = len(fixtures)
+    long = pd.DataFrame({
+        'row': np.concatenate([np.arange(n), np.arange(n)]),
+        'side': np.repeat(['h', 'a'], n),
+        'team': np.concatenate([fixtures['home_id'], fixtures['away_id']]),
+        'ts': np.concatenate([fixtures['ts'], fixtures['ts']]),
+        'gf': np.concatenate([fixtures['goals_home'], fixtures['goals_away']]),
+        'ga': np.concatenate([fixtures['goals_away'], fixtures['goals_home']]),
+    }).sort_values(['ts', 'row'], kind='stable')
+    long['pts'] = np.select([long['gf'] > long['ga'], long['gf'] == long['ga']], [3, 1], 0)
+
+    g = long.groupby('team', sort=False)
+    played = g.cumcount()
+    gf_before = g['gf'].cumsum() - long['gf']
+    ga_before = g['ga'].cumsum() - long['ga']
+    cum_pts = g['pts'].cumsum()
+    # Forme : points des 5 derniers matchs avant celui-ci
+    form_pts = (cum_pts - long['pts']) - cum_pts.groupby(long['team']).shift(6).fillna(0)
+    form_len = np.minimum(played, 5)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        avg_gf = np.where(played > 0, gf_before / played, np.nan)
+        avg_ga = np.where(played > 0, ga_before / played, np.nan)
+        long['atk'] = np.minimum(100, np.trunc(avg_gf / 2.5 * 100))
+        long['def'] = np.clip(np.trunc(100 - avg_ga / 2.0 * 100), 10, 100)
+        long['dyn'] = np.where(form_len > 0, np.trunc(form_pts / (form_len * 3) * 100), 70)
+    long['xg'] = np.round(avg_gf, 2)
+    long['played'] = played
+
+    wide = long.pivot(index='row', columns='side', values=['atk', 'def', 'dyn', 'xg', 'played']).sort_index()
+    wide.columns = [f"{stat}_{side}" for stat, side in wide.columns]
+
+    # Première journée : mêmes stats de repli que l'app (une seule fois par équipe)
+    for side, name_col in (('h', 'home'), ('a', 'away')):
+        missing = wide[f'played_{side}'].to_numpy() == 0
+        if missing.any():
+            fallback = {name: get_fallback_stats(name) for name in fixtures[name_col][missing].unique()}
+            names = fixtures[name_col].to_numpy()[missing]
+            for stat in ('atk', 'def', 'dyn', 'xg'):
+                wide.loc[missing, f'{stat}_{side}'] = [fallback[nm][stat] for nm in names]
+    return wide.reset_index(drop=True)
+
+
+def predict_partition(fixtures, odds):
+    fixtures = fixtures.sort_values('ts', kind='stable').reset_index(drop=True)
+    feats = pre_match_features(fixtures)
+    power_h = feats['atk_h'] + feats['def_h'] + feats['dyn_h'] + 10
+    power_a = feats['atk_a'] + feats['def_a'] + feats['dyn_a']
+    prob_h, prob_n, prob_a = probabilities_from_power(power_h, power_a)
+    goals = goal_markets(feats['xg_h'].to_numpy(float), feats['xg_a'].to_numpy(float))
+
+    out = fixtures[['fixture_id', 'league_id', 'season', 'goals_home', 'goals_away']].copy()
+    out['p_home'], out['p_draw'], out['p_away'] = prob_h / 100, prob_n / 100, prob_a / 100
+    out['p_over25'] = goals['over'][2.5]
+    out['p_btts'] = goals['btts']
+    return out.merge(odds, on='fixture_id', how='left')
+
+
+def _evaluate_partition(league_id, season):
+    fixtures_file = _path("fixtures", league_id, season)
+    if not os.path.exists(fixtures_file): return None
+    fixtures = pd.read_parquet(fixtures_file)
+    if fixtures.empty: return None
+    odds_file = _path("odds", league_id, season)
+    odds = pd.read_parquet(odds_file) if os.path.exists(odds_file) else odds_frame([])
+    # Fichiers ingérés avant l'agrégation multi-bookmakers : pas de colonnes fair_*
+    odds = odds.reindex(columns=['fixture_id'] + ODDS_COLUMNS)
+    return predict_partition(fixtures, odds)
+
+
+def _evaluate_partition_args(args):
+    return _evaluate_partition(*args)
+
+
+# --- RAPPORT ---
+def _binary_scores(p, y):
+    p = np.clip(p, 1e-6, 1 - 1e-6)
+    return np.mean((p - y) ** 2), -np.mean(y * np.log(p) + (1 - y) * np.log(1 - p))
+
+
+def _roi(stake_mask, won, odds):
+    bets = int(stake_mask.sum())
+    if not bets: return bets, np.nan, np.nan
+    profit = np.where(won[stake_mask], odds[stake_mask] - 1, -1).sum()
+    return bets, won[stake_mask].mean(), profit / bets
+
+
+def calibration(p, y):
+    """Fréquence observée par tranche de 10 % de probabilité annoncée."""
+    bins = np.clip(np.digitize(p, CALIBRATION_BINS[1:-1]), 0, len(CALIBRATION_BINS) - 2)
+    df = pd.DataFrame({'bin': bins, 'p': p, 'y': y}).groupby('bin').agg(n=('y', 'size'), predicted=('p', 'mean'), observed=('y', 'mean'))
+    df.index = [f"{int(CALIBRATION_BINS[i] * 100)}-{int(CALIBRATION_BINS[i + 1] * 100)}%" for i in df.index]
+    return df.round(3)
+
+
+def report(pred):
+    gh, ga = pred['goals_home'].to_numpy(), pred['goals_away'].to_numpy()
+    outcome = np.select([gh > ga, gh == ga], [0, 1], 2)
+    p1x2 = pred[['p_home', 'p_draw', 'p_away']].to_numpy()
+    y1x2 = np.eye(3)[outcome]
+
+    rows = []
+    brier = np.mean(((p1x2 - y1x2) ** 2).sum(axis=1))
+    logloss = -np.mean(np.log(np.clip(p1x2[np.arange(len(pred)), outcome], 1e-6, 1)))
+
+    # ROI 1X2 : même règle que detect_value_bet (1, puis 2, puis N ; un pari max par match)
+    odds1x2 = pred[['odd_home', 'odd_draw', 'odd_away']].to_numpy(float)
+    fair1x2 = market_fair(odds1x2, pred[['fair_home', 'fair_draw', 'fair_away']].to_numpy(float))
+    thresholds = np.array([VALUE_THRESHOLDS['Home'], VALUE_THRESHOLDS['Draw'], VALUE_THRESHOLDS['Away']])
+    value = value_flags(p1x2, odds1x2, fair1x2, thresholds)
+    pick = np.where(value[:, 0], 0, np.where(value[:, 2], 2, np.where(value[:, 1], 1, -1)))
+    staked = pick >= 0
+    picked_odds = np.where(staked, odds1x2[np.arange(len(pred)), np.maximum(pick, 0)], np.nan)
+    bets, hit, roi = _roi(staked, pick == outcome, picked_odds)
+    rows.append(('1X2', len(pred), brier, logloss, bets, hit, roi))
+
+    for market, name, y in (
+        ('Over 2.5', 'over25', (gh + ga) > 2),
+        ('BTTS', 'btts', (gh > 0) & (ga > 0)),
+    ):
+        p, odds = pred[f'p_{name}'].to_numpy(), pred[f'odd_{name}'].to_numpy(float)
+        fair = pred[f'fair_{name}'].to_numpy(float)
+        with np.errstate(divide='ignore'):
+            fair = np.where(np.isnan(fair), 1.0 / odds, fair)
+        b, ll = _binary_scores(p, y.astype(float))
+        bets, hit, roi = _roi(value_flags(p, odds, fair, GOALS_VALUE_THRESHOLD), y, odds)
+        rows.append((market, len(pred), b, ll, bets, hit, roi))
+
+    summary = pd.DataFrame(rows, columns=['market', 'matches', 'brier', 'log_loss', 'value_bets', 'hit_rate', 'roi']).set_index('market')
+    return summary.round(4), calibration(p1x2.ravel(), y1x2.ravel())
+
+
+def run(leagues, seasons, workers=None):
+    partitions = [(lid, season) for lid in leagues for season in seasons]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        frames = [f for f in pool.map(_evaluate_partition_args, partitions) if f is not None]
+    if not frames: return None
+    return pd.concat(frames, ignore_index=True)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("command", choices=["ingest", "run"])
+    p.add_argument("--seasons", type=int, nargs="+", default=[sports_api.current_season() - 1])
+    p.add_argument("--leagues", type=int, nargs="+", default=list(sports_api.TOP_LEAGUES))
+    p.add_argument("--workers", type=int, default=None)
+    args = p.parse_args(argv)
+
+    if args.command == "ingest":
+        for lid in args.leagues:
+            for season in args.seasons:
+                try:
+                    n_fix, n_odds = ingest(lid, season)
+                    print(f"{sports_api.TOP_LEAGUES.get(lid, lid)} {season} : {n_fix} matchs, {n_odds} cotes")
+                except ApiError as e:
+                    print(f"{sports_api.TOP_LEAGUES.get(lid, lid)} {season} : échec ({e})", file=sys.stderr)
+        return
+
+    t0 = time.perf_counter()
+    pred = run(args.leagues, args.seasons, args.workers)
+    if pred is None:
+        sys.exit("Aucune donnée : lancer d'abord `python backtest.py ingest`.")
+    summary, calib = report(pred)
+    print(f"{len(pred)} matchs évalués en {time.perf_counter() - t0:.2f}s\n")
+    print(summary.to_string())
+    print("\nCalibration 1X2 :")
+    print(calib.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Serveur de rejeu hors-ligne API-sports + faux endpoint Groq.
+
+Sert les réponses enregistrées de /fixtures, /standings, /odds et /fixtures/headtohead
+(répertoire --data, un fichier JSON par requête), avec latence et rate-limit configurables.
+Sans enregistrement, --synthetic génère des réponses déterministes et plausibles.
+
+    python bench/replay_server.py --port 8765 --latency 0.12 --rpm 300 --synthetic
+    python bench/replay_server.py --record --upstream https://v3.football.api-sports.io   # API_SPORTS_KEY requis
+
+Puis lancer l'app avec API_SPORTS_BASE_URL=http://127.0.0.1:8765 et GROQ_BASE_URL=http://127.0.0.1:8765.
+GET /__stats renvoie les compteurs de requêtes, POST /__reset les remet à zéro.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+
+API_ENDPOINTS = ("/fixtures", "/standings", "/odds", "/fixtures/headtohead")
+GROQ_ENDPOINT = "/openai/v1/chat/completions"
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+ODDS_PAGE_SIZE = 10
+# Limite annoncée quand --rpm / --daily vaut 0 : restant = limite - consommé, jamais 0 par défaut
+UNLIMITED = 999999
+ODDS_BOOKMAKERS = ((8, "Bet365"), (6, "Bwin"), (16, "Unibet"), (11, "1xBet"), (1, "10Bet"), (3, "Betfair"))
+ODDS_BETS = {1: "Match Winner", 5: "Goals Over/Under", 8: "Both Teams Score"}
+FAKE_ANALYSIS = (
+    "1. 🟢 PARI SAFE : Double chance domicile, l'écart de forme est net.\n"
+    "2. 🟡 PARI AUDACIEUX : Plus de 2.5 buts, les deux attaques tournent au-dessus de 1.5 but par match.\n"
+    "3. 🔴 COUP DE POKER : Score exact 2-1."
+)
+
+
+def recording_path(data_dir, endpoint, params):
+    digest = hashlib.sha1(urlencode(sorted(params.items())).encode()).hexdigest()[:16]
+    return os.path.join(data_dir, endpoint.strip("/").replace("/", "_"), f"{digest}.json")
+
+
+# --- Données synthétiques déterministes ---
+def _team(league_id, k):
+    team_id = league_id * 100 + k
+    return {"id": team_id, "name": f"Team {team_id}", "logo": f"https://media.api-sports.io/football/teams/{team_id}.png"}
+
+
+def _rng(*parts):
+    return random.Random(hashlib.md5(repr(parts).encode()).hexdigest())
+
+
+def synth_fixtures(params):
+    league_id = int(params.get("league", 39))
+    start = datetime.strptime(params.get("from") or params.get("date"), "%Y-%m-%d")
+    end = datetime.strptime(params.get("to") or params.get("date"), "%Y-%m-%d")
+    fixtures = []
+    day = start
+    while day <= end:
+        rng = _rng("fixtures", league_id, day.date())
+        teams = rng.sample(range(20), 10)
+        for n in range(5):
+            kickoff = day.replace(hour=13 + 2 * n, minute=0)
+            fixtures.append({
+                "fixture": {"id": int(f"{league_id}{day:%m%d}{n}"), "date": kickoff.strftime("%Y-%m-%dT%H:%M:%S+02:00"),
+                            "timestamp": int(kickoff.timestamp()), "status": {"short": "NS", "long": "Not Started", "elapsed": None},
+                            "venue": {"id": None, "name": "Stadium", "city": "City"}, "referee": None},
+                "league": {"id": league_id, "name": f"League {league_id}", "season": int(params.get("season", day.year))},
+                "teams": {"home": _team(league_id, teams[2 * n]), "away": _team(league_id, teams[2 * n + 1])},
+                "goals": {"home": None, "away": None},
+                "score": {"halftime": {"home": None, "away": None}, "fulltime": {"home": None, "away": None}},
+            })
+        day += timedelta(days=1)
+    return {"errors": [], "results": len(fixtures), "paging": {"current": 1, "total": 1}, "response": fixtures}
+
+
+def synth_live(params):
+    """Matchs du jour en cours à l'heure actuelle : minute, statut et buts déduits de l'horloge."""
+    now = datetime.now()
+    live = []
+    for league_id in params["live"].split("-"):
+        for f in synth_fixtures({"league": league_id, "date": now.strftime("%Y-%m-%d")})["response"]:
+            minutes = (now.timestamp() - f["fixture"]["timestamp"]) / 60
+            if not 0 <= minutes < 105: continue
+            # Mi-temps de 15 minutes entre la 45e et la 60e
+            elapsed = int(minutes) if minutes < 45 else 45 if minutes < 60 else int(minutes) - 15
+            status = "1H" if minutes < 45 else "HT" if minutes < 60 else "2H"
+            rng = _rng("live", f["fixture"]["id"])
+            goals = {side: sum(m <= elapsed for m in rng.sample(range(1, 91), rng.randint(0, 4))) for side in ("home", "away")}
+            f["fixture"]["status"] = {"short": status, "long": status, "elapsed": elapsed}
+            f["goals"] = goals
+            live.append(f)
+    return {"errors": [], "results": len(live), "paging": {"current": 1, "total": 1}, "response": live}
+
+
+def synth_standings(params):
+    league_id = int(params.get("league", 39))
+    rng = _rng("standings", league_id)
+    rows = []
+    for k in range(20):
+        played = 10
+        gf, ga = rng.randint(5, 28), rng.randint(5, 25)
+        rows.append({"team": _team(league_id, k), "all": {"played": played, "goals": {"for": gf, "against": ga}},
+                     "form": "".join(rng.choice("WDL") for _ in range(5)), "points": rng.randint(5, 28)})
+    rows.sort(key=lambda r: -r["points"])
+    for rank, row in enumerate(rows, 1): row["rank"] = rank
+    return {"errors": [], "results": 1, "response": [{"league": {"id": league_id, "standings": [rows]}}]}
+
+
+def synth_odds(params):
+    day = params.get("date")
+    league_id = int(params.get("league", 39))
+    if "fixture" in params:
+        items = [{"fixture": {"id": int(params["fixture"])}}]
+    else:
+        items = [{"fixture": {"id": f["fixture"]["id"]}} for f in synth_fixtures({"league": league_id, "date": day})["response"]]
+    for item in items:
+        rng = _rng("odds", item["fixture"]["id"])
+        # Probas "vraies" du match, puis chaque bookmaker applique sa marge et un peu de bruit
+        home, over, btts = rng.uniform(0.2, 0.65), rng.uniform(0.35, 0.65), rng.uniform(0.4, 0.65)
+        draw = rng.uniform(0.2, 0.3)
+        true = {1: {"Home": home, "Draw": draw, "Away": max(0.05, 1 - home - draw)},
+                5: {"Over 2.5": over, "Under 2.5": 1 - over},
+                8: {"Yes": btts, "No": 1 - btts}}
+        item["bookmakers"] = []
+        for book_id, name in ODDS_BOOKMAKERS[:rng.randint(3, len(ODDS_BOOKMAKERS))]:
+            margin = rng.uniform(1.03, 1.08)
+            item["bookmakers"].append({"id": book_id, "name": name, "bets": [
+                {"id": bet_id, "name": ODDS_BETS[bet_id], "values": [
+                    {"value": value, "odd": f"{1 / (p * margin * rng.uniform(0.97, 1.03)):.2f}"} for value, p in probs.items()
+                ]} for bet_id, probs in true.items()
+            ]})
+    page = int(params.get("page", 1))
+    total = max(1, -(-len(items) // ODDS_PAGE_SIZE))
+    chunk = items[(page - 1) * ODDS_PAGE_SIZE: page * ODDS_PAGE_SIZE]
+    return {"errors": [], "results": len(chunk), "paging": {"current": page, "total": total}, "response": chunk}
+
+
+def synth_h2h(params):
+    home, away = (int(x) for x in params["h2h"].split("-"))
+    rng = _rng("h2h", home, away)
+    last = int(params.get("last", 3))
+    items = []
+    for k in range(last):
+        played = datetime.now() - timedelta(days=120 * (k + 1))
+        goals = {"home": rng.randint(0, 3), "away": rng.randint(0, 3)}
+        items.append({
+            "fixture": {"id": int(f"9{home}{away}{k}"), "date": played.strftime("%Y-%m-%dT20:00:00+00:00"),
+                        "timestamp": int(played.timestamp()), "status": {"short": "FT", "long": "Match Finished", "elapsed": 90}},
+            "league": {"id": home // 100, "name": f"League {home // 100}"},
+            "teams": {"home": _team(home // 100, home % 100), "away": _team(away // 100, away % 100)},
+            "goals": goals, "score": {"fulltime": dict(goals)},
+        })
+    return {"errors": [], "results": last, "response": items}
+
+
+def synth_any_fixtures(params):
+    return synth_live(params) if "live" in params else synth_fixtures(params)
+
+
+SYNTHETIC = {"/fixtures": synth_any_fixtures, "/standings": synth_standings, "/odds": synth_odds, "/fixtures/headtohead": synth_h2h}
+
+
+class ReplayState:
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.counts = {}
+            self.bytes = 0
+            self.minute_window = (int(time.time() // 60), 0)
+            self.daily_used = 0
+
+    def take_quota(self):
+        """(autorisé, raison, restant minute, restant jour)."""
+        with self.lock:
+            minute = int(time.time() // 60)
+            window, used = self.minute_window
+            if window != minute: used = 0
+            rpm, daily = self.args.rpm or UNLIMITED, self.args.daily or UNLIMITED
+            if self.daily_used >= daily:
+                return False, "requests", max(0, rpm - used), 0
+            if used >= rpm:
+                self.minute_window = (minute, used)
+                return False, "rateLimit", 0, daily - self.daily_used
+            self.minute_window = (minute, used + 1)
+            self.daily_used += 1
+            return True, None, rpm - used - 1, daily - self.daily_used
+
+    def count(self, endpoint, size):
+        with self.lock:
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            self.bytes += size
+
+
+def make_handler(state):
+    args = state.args
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *a):
+            if args.verbose: super().log_message(*a)
+
+        def _send_json(self, status, body, headers=None):
+            raw = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for k, v in (headers or {}).items(): self.send_header(k, str(v))
+            self.end_headers()
+            self.wfile.write(raw)
+            return len(raw)
+
+        def _sleep(self):
+            if args.latency or args.jitter:
+                time.sleep(max(0.0, args.latency + random.uniform(-args.jitter, args.jitter)))
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/__stats":
+                with state.lock:
+                    self._send_json(200, {"requests": dict(state.counts), "total": sum(state.counts.values()), "bytes": state.bytes})
+                return
+            if url.path not in API_ENDPOINTS:
+                self._send_json(404, {"errors": {"endpoint": "unknown"}})
+                return
+
+            params = dict(parse_qsl(url.query))
+            self._sleep()
+            allowed, reason, minute_left, daily_left = state.take_quota()
+            headers = {
+                "X-RateLimit-Limit": args.rpm or UNLIMITED, "X-RateLimit-Remaining": minute_left,
+                "x-ratelimit-requests-limit": args.daily or UNLIMITED, "x-ratelimit-requests-remaining": daily_left,
+            }
+            if not allowed:
+                # Même forme que l'API réelle : HTTP 200 avec un bloc 'errors'
+                message = "Too many requests" if reason == "rateLimit" else "You have reached the request limit for the day"
+                state.count(url.path, self._send_json(200, {"errors": {reason: message}, "response": []}, headers))
+                return
+
+            body = self._load(url.path, params)
+            if body is None:
+                state.count(url.path, self._send_json(404, {"errors": {"replay": "no recording for this request"}, "response": []}, headers))
+                return
+            state.count(url.path, self._send_json(200, body, headers))
+
+        def _load(self, endpoint, params):
+            path = recording_path(args.data, endpoint, params)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f: return json.load(f)
+            if args.record:
+                r = requests.get(f"{args.upstream}{endpoint}", params=params, timeout=15,
+                                 headers={"x-apisports-key": os.environ.get("API_SPORTS_KEY", "")})
+                body = r.json()
+                if not body.get("errors"):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, "w", encoding="utf-8") as f: json.dump(body, f)
+                return body
+            if args.synthetic:
+                return SYNTHETIC[endpoint](params)
+            return None
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            if url.path == "/__reset":
+                state.reset()
+                self._send_json(200, {"ok": True})
+                return
+            if url.path != GROQ_ENDPOINT:
+                self._send_json(404, {"error": "unknown"})
+                return
+
+            state.count(GROQ_ENDPOINT, 0)
+            time.sleep(args.llm_ttft)
+            words = FAKE_ANALYSIS.split(" ")
+            if not payload.get("stream"):
+                self._send_json(200, {
+                    "id": "fake", "object": "chat.completion", "created": int(time.time()), "model": payload.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": FAKE_ANALYSIS}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": 400, "completion_tokens": len(words), "total_tokens": 400 + len(words)},
+                })
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i, word in enumerate(words):
+                chunk = {"id": "fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": payload.get("model"),
+                         "choices": [{"index": 0, "delta": {"content": word + (" " if i < len(words) - 1 else "")}, "finish_reason": None}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                time.sleep(args.llm_token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.close_connection = True
+
+    return Handler
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--data", default=DEFAULT_DATA_DIR, help="répertoire des enregistrements")
+    p.add_argument("--latency", type=float, default=0.1, help="latence ajoutée par requête API (s)")
+    p.add_argument("--jitter", type=float, default=0.0)
+    p.add_argument("--rpm", type=int, default=0, help="limite par minute (0 = illimité)")
+    p.add_argument("--daily", type=int, default=0, help="quota journalier (0 = illimité)")
+    p.add_argument("--synthetic", action="store_true", help="génère les réponses absentes des enregistrements")
+    p.add_argument("--record", action="store_true", help="relaie les requêtes manquantes vers --upstream et les enregistre")
+    p.add_argument("--upstream", default="https://v3.football.api-sports.io")
+    p.add_argument("--llm-ttft", type=float, default=0.3, help="délai avant le premier token du faux Groq (s)")
+    p.add_argument("--llm-token-delay", type=float, default=0.01)
+    p.add_argument("--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+def start_server(args):
+    """Démarre le serveur dans un thread daemon ; renvoie (serveur, état)."""
+    state = ReplayState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="replay-server", daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    server, _ = start_server(args)
+    print(f"Replay API-sports/Groq sur http://{args.host}:{server.server_port}", flush=True)
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
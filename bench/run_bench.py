@@ -0,0 +1,270 @@
+"""Benchmark de bout en bout des vues 'home', 'match' et 'team_profile'.
+
+Démarre le serveur de rejeu (données synthétiques par défaut), exécute app.py sans
+navigateur via streamlit.testing.v1.AppTest et rapporte pour chaque vue :
+temps de rendu p50/p95 (premier passage de la session puis rerun), requêtes API
+envoyées et ratio de hits du cache, ainsi que le démarrage à froid (premier rendu
+de 'home' dans un interpréteur neuf, imports compris).
+
+--checks vérifie à la place le gouverneur et l'oracle contre des serveurs de rejeu
+dédiés : coalescence, retry sur rateLimit, mode dégradé au quota du jour (--daily)
+et coalescence des analyses Groq. Code de sortie 1 si un contrôle échoue.
+
+    python bench/run_bench.py --runs 20 --latency 0.12
+    python bench/run_bench.py --data bench/recordings --no-synthetic --json bench_output.json
+    python bench/run_bench.py --checks
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import replay_server  # noqa: E402
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    if not ordered: return 0.0
+    idx = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def server_stats(base_url):
+    import requests
+    return requests.get(f"{base_url}/__stats", timeout=5).json()
+
+
+def cache_totals():
+    import sports_api
+    return sports_api.get_cache().stats()["total"]
+
+
+def new_app(timeout):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=timeout)
+    at.secrets["API_SPORTS_KEY"] = "bench"
+    at.secrets["GROQ_API_KEY"] = "bench"
+    return at
+
+
+def measure(name, runs, base_url, prepare, timeout, cold):
+    """Exécute la vue `runs` fois ; `prepare(at)` place la session dans l'état voulu."""
+    import streamlit as st
+
+    timings, reruns = [], []
+    before_requests = server_stats(base_url)["total"]
+    before_cache = cache_totals()
+    for _ in range(runs):
+        if cold: st.cache_data.clear()
+        at = new_app(timeout)
+        prepare(at)
+        t0 = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - t0) * 1000)
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+        # Même session, même état : coût fixe d'un rerun (script, style, caches)
+        t0 = time.perf_counter()
+        at.run()
+        reruns.append((time.perf_counter() - t0) * 1000)
+    after_cache = cache_totals()
+
+    served = {k: after_cache[k] - before_cache[k] for k in ("hit", "stale", "miss")}
+    total_served = sum(served.values())
+    return {
+        "view": name,
+        "runs": runs,
+        "first_ms": round(timings[0], 1),
+        "p50_ms": round(percentile(timings, 50), 1),
+        "p95_ms": round(percentile(timings, 95), 1),
+        "rerun_p50_ms": round(percentile(reruns, 50), 1),
+        "api_requests": server_stats(base_url)["total"] - before_requests,
+        "cache_hit_ratio": round((served["hit"] + served["stale"]) / total_served, 3) if total_served else None,
+    }
+
+
+def cold_start(runs, timeout):
+    """Premier rendu de 'home' dans `runs` processus neufs (import de Streamlit et de l'app compris)."""
+    probe = ("import sys, time; t0 = time.perf_counter(); sys.path.insert(0, sys.argv[1]); "
+             "from run_bench import new_app; at = new_app(float(sys.argv[2])); at.run(); "
+             "print((time.perf_counter() - t0) * 1000)")
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", probe, os.path.dirname(os.path.abspath(__file__)), str(timeout)],
+                             capture_output=True, text=True, timeout=timeout, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return {
+        "view": "cold_start", "runs": runs, "first_ms": round(timings[0], 1),
+        "p50_ms": round(percentile(timings, 50), 1), "p95_ms": round(percentile(timings, 95), 1),
+        "rerun_p50_ms": None, "api_requests": None, "cache_hit_ratio": None,
+    }
+
+
+# --- Contrôles du gouverneur et de l'oracle ---
+CONCURRENT_CALLS = 8
+
+
+def replay(latency, **limits):
+    """Serveur de rejeu synthétique propre à un contrôle : (url, état, serveur)."""
+    argv = ["--port", "0", "--latency", str(latency), "--synthetic", "--llm-ttft", "0.2", "--llm-token-delay", "0.005"]
+    for name, value in limits.items(): argv += [f"--{name}", str(value)]
+    server, state = replay_server.start_server(replay_server.parse_args(argv))
+    return f"http://127.0.0.1:{server.server_port}", state, server
+
+
+def sender(base_url, league_id):
+    import requests
+    return lambda: requests.get(f"{base_url}/standings", params={"league": league_id, "season": 2026}, timeout=10)
+
+
+def check_coalescing():
+    from governor import QuotaGovernor
+    base_url, state, server = replay(0.2)
+    gov = QuotaGovernor(rpm=600)
+    with ThreadPoolExecutor(CONCURRENT_CALLS) as pool:
+        bodies = list(pool.map(lambda _: gov.call("standings-39", sender(base_url, 39)), range(CONCURRENT_CALLS)))
+    server.shutdown()
+    sent = state.counts.get("/standings", 0)
+    ok = sent == 1 and gov.status()["coalesced"] == CONCURRENT_CALLS - 1 and all(b is bodies[0] for b in bodies)
+    return "coalescence", ok, f"{CONCURRENT_CALLS} appels simultanés -> {sent} requête(s)"
+
+
+def check_rate_limit_retry():
+    from governor import QuotaGovernor
+    base_url, state, server = replay(0.0, rpm=120)
+    gov = QuotaGovernor(rpm=600)
+    # Minute déjà consommée par un autre client, puis passage à la minute suivante 0.3 s plus tard
+    with state.lock: state.minute_window = (int(time.time() // 60), 120)
+    threading.Timer(0.3, state.reset).start()
+    body = gov.call("standings-61", sender(base_url, 61))
+    server.shutdown()
+    retries = gov.status()["retries"]
+    ok = not body.get("errors") and retries >= 1 and not gov.status()["degraded"]
+    return "retry rateLimit", ok, f"{retries} retry, réponse {'valide' if not body.get('errors') else 'en erreur'}"
+
+
+def check_daily_quota(daily):
+    from governor import QuotaExhausted, QuotaGovernor
+    base_url, state, server = replay(0.0, daily=daily)
+    gov = QuotaGovernor(rpm=600)
+    # Le dernier appel du quota répond normalement (remaining: 0), le suivant ne part plus
+    for league_id in range(1, daily + 1): gov.call(f"standings-{league_id}", sender(base_url, league_id))
+    try:
+        gov.call("standings-0", sender(base_url, 0))
+        blocked = False
+    except QuotaExhausted:
+        blocked = True
+    server.shutdown()
+    status, sent = gov.status(), state.counts.get("/standings", 0)
+    ok = blocked and status["degraded"] and status["quota_exhausted"] and sent == daily
+    return "mode dégradé", ok, f"quota {daily}/jour : {sent} requête(s), dégradé={status['degraded']}"
+
+
+def check_oracle_coalescing():
+    import oracle
+    base_url, state, server = replay(0.0)
+    oracle.configure("bench", base_url)
+    stats = {"rank": 1, "atk": 80, "def": 70, "dyn": 60, "xg": 1.8}
+    with ThreadPoolExecutor(CONCURRENT_CALLS) as pool:
+        texts = list(pool.map(lambda _: oracle.get_ai_prediction("Bench FC", "Replay United", stats, stats, {}, "", []),
+                              range(CONCURRENT_CALLS)))
+    server.shutdown()
+    sent = state.counts.get(replay_server.GROQ_ENDPOINT, 0)
+    ok = sent == 1 and all(t == replay_server.FAKE_ANALYSIS for t in texts)
+    return "coalescence Groq", ok, f"{CONCURRENT_CALLS} analyses identiques -> {sent} complétion(s)"
+
+
+def run_checks(daily):
+    results = [check_coalescing(), check_rate_limit_retry(), check_daily_quota(daily), check_oracle_coalescing()]
+    for name, ok, detail in results:
+        print(f"{'OK' if ok else 'ÉCHEC':<7}{name:<20}{detail}")
+    return all(ok for _, ok, _ in results)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--latency", type=float, default=0.1)
+    p.add_argument("--rpm", type=int, default=0)
+    p.add_argument("--daily", type=int, default=0, help="quota journalier du serveur de rejeu (0 = illimité ; --checks : 3)")
+    p.add_argument("--data", default=replay_server.DEFAULT_DATA_DIR)
+    p.add_argument("--no-synthetic", action="store_true")
+    p.add_argument("--cold", action="store_true", help="vide st.cache_data avant chaque rendu (cache disque seul)")
+    p.add_argument("--timeout", type=float, default=60)
+    p.add_argument("--cold-starts", type=int, default=1, help="processus neufs pour le démarrage à froid (0 = ignoré)")
+    p.add_argument("--json", help="écrit aussi le rapport dans ce fichier")
+    p.add_argument("--checks", action="store_true", help="contrôles du gouverneur et de l'oracle au lieu des vues")
+    args = p.parse_args(argv)
+
+    if args.checks:
+        os.environ["PREDICTECH_CACHE_DB"] = os.path.join(tempfile.mkdtemp(prefix="predictech-checks-"), "cache.sqlite3")
+        sys.exit(0 if run_checks(args.daily or 3) else 1)
+
+    server_args = replay_server.parse_args([
+        "--port", "0", "--latency", str(args.latency), "--rpm", str(args.rpm), "--daily", str(args.daily),
+        "--data", args.data, "--llm-ttft", "0.05",
+    ] + ([] if args.no_synthetic else ["--synthetic"]))
+    server, _ = replay_server.start_server(server_args)
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    # Environnement isolé : API et Groq vers le serveur de rejeu, cache disque jetable, pas de préchauffage
+    os.environ["API_SPORTS_BASE_URL"] = base_url
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ["PREDICTECH_CACHE_DB"] = os.path.join(tempfile.mkdtemp(prefix="predictech-bench-"), "cache.sqlite3")
+    os.environ["PREFETCH_IN_APP"] = "0"
+
+    import sports_api
+    sports_api.configure("bench", base_url)
+    catalog = sports_api.fetch_catalog_window(time.strftime("%Y-%m-%d"), sports_api.CATALOG_DAYS)
+    fixture = next((f for day in catalog.values() for f in day), None)
+    if fixture is None:
+        sys.exit("Aucun match dans les données rejouées : enregistrer une fenêtre ou utiliser --synthetic.")
+    from model import build_team_index, calculate_true_stats
+    team_stats = calculate_true_stats(fixture.home.id, fixture.home.name,
+                                      build_team_index(sports_api.fetch_standings(fixture.league_id)))
+    sports_api.get_cache().reset_stats()
+
+    def home(at):
+        at.session_state["view"] = "home"
+
+    def match(at):
+        at.session_state["view"] = "match"
+        at.session_state["match_data"] = fixture
+
+    def team_profile(at):
+        at.session_state["view"] = "team_profile"
+        at.session_state["match_data"] = fixture
+        at.session_state["team_data"] = {"team": fixture.home, "stats": team_stats}
+
+    report = [measure(name, args.runs, base_url, prepare, args.timeout, args.cold)
+              for name, prepare in (("home", home), ("match", match), ("team_profile", team_profile))]
+    if args.cold_starts > 0:
+        report.append(cold_start(args.cold_starts, args.timeout))
+
+    header = (f"{'vue':<14}{'runs':>6}{'1er (ms)':>11}{'p50 (ms)':>11}{'p95 (ms)':>11}{'rerun (ms)':>12}"
+              f"{'req. API':>10}{'hit ratio':>11}")
+    print(header)
+    print("-" * len(header))
+    for r in report:
+        ratio = "-" if r["cache_hit_ratio"] is None else f"{r['cache_hit_ratio']:.2f}"
+        rerun = "-" if r["rerun_p50_ms"] is None else r["rerun_p50_ms"]
+        requests = "-" if r["api_requests"] is None else r["api_requests"]
+        print(f"{r['view']:<14}{r['runs']:>6}{r['first_ms']:>11}{r['p50_ms']:>11}{r['p95_ms']:>11}{rerun:>12}"
+              f"{requests:>10}{ratio:>11}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(report, f, indent=2)
+    server.shutdown()
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Export en lot des prédictions du jour (ou d'une plage de dates), sans navigateur.
+
+Une ligne par match TOP_LEAGUES : stats retenues, probabilités 1X2 du modèle,
+marchés buts de la matrice de score, cotes agrégées (meilleure cote, proba sans
+marge) et value flags, avec les mêmes fonctions et la même règle que l'app et le
+scanner. Catalogue, cotes et classements sont chargés en parallèle
+(scanner.load_window), puis tout le calcul est vectorisé sur la plage entière.
+
+    python export.py --days 3 -o predictions.parquet
+    python export.py --from 2026-10-18 --to 2026-10-25 -o slate.csv
+    python export.py -o - --format json            # sortie standard, pour un pipe
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import sports_api
+from model import calculate_true_stats, value_flags
+from scanner import OUTCOMES, THRESHOLDS, load_window, market_prices, model_probabilities
+from score_matrix import MAX_GOALS
+
+FORMATS = ('parquet', 'csv', 'json')
+# Suffixe des colonnes odd_* / fair_* / value_* par issue de scanner.OUTCOMES
+COLUMN_NAMES = {'Home': 'home', 'Draw': 'draw', 'Away': 'away', 'Over 2.5': 'over25', 'Yes': 'btts'}
+# Priorité de detect_value_bet : 1, puis 2, puis N
+VALUE_PRIORITY = ('Home', 'Away', 'Draw')
+
+
+def predict_fixtures(fixtures, odds_table, team_indexes):
+    """DataFrame d'une ligne par match (records.Fixture), triée par coup d'envoi. Cotes absentes : NaN."""
+    if not fixtures: return pd.DataFrame()
+    fixtures = sorted(fixtures, key=lambda f: f.timestamp)
+    stats_h = [calculate_true_stats(f.home.id, f.home.name, team_indexes.get(f.league_id)) for f in fixtures]
+    stats_a = [calculate_true_stats(f.away.id, f.away.name, team_indexes.get(f.league_id)) for f in fixtures]
+    xg_h, xg_a = np.array([s['xg'] for s in stats_h]), np.array([s['xg'] for s in stats_a])
+    probs, goals = model_probabilities(stats_h, stats_a)
+    best_score = goals['correct_score'].reshape(len(fixtures), -1).argmax(axis=1)
+
+    ids = [f.id for f in fixtures]
+    # Même règle que le scanner (onglet Value Bets) : 1X2, Over 2.5 et BTTS
+    odds, fair = market_prices(odds_table, ids)
+    value = value_flags(probs, odds, fair, THRESHOLDS)
+
+    df = pd.DataFrame({
+        'fixture_id': ids,
+        'kickoff': [f.date for f in fixtures],
+        'league_id': [f.league_id for f in fixtures],
+        'league': [sports_api.TOP_LEAGUES.get(f.league_id, f.league_name) for f in fixtures],
+        'home_id': [f.home.id for f in fixtures],
+        'home': [f.home.name for f in fixtures],
+        'away_id': [f.away.id for f in fixtures],
+        'away': [f.away.name for f in fixtures],
+        'xg_home': xg_h,
+        'xg_away': xg_a,
+        'fallback_home': [bool(s.get('is_fallback')) for s in stats_h],
+        'fallback_away': [bool(s.get('is_fallback')) for s in stats_a],
+        'p_home': probs[:, 0],
+        'p_draw': probs[:, 1],
+        'p_away': probs[:, 2],
+        'p_over15': goals['over'][1.5],
+        'p_over25': goals['over'][2.5],
+        'p_over35': goals['over'][3.5],
+        'p_btts': goals['btts'],
+        'likely_score': [f"{k // (MAX_GOALS + 1)}-{k % (MAX_GOALS + 1)}" for k in best_score],
+        'books': odds_table.books_for(ids),
+    })
+    for j, outcome in enumerate(OUTCOMES):
+        name = COLUMN_NAMES[outcome]
+        df[f'odd_{name}'] = odds[:, j]
+        df[f'fair_{name}'] = fair[:, j]
+        df[f'value_{name}'] = value[:, j]
+
+    flagged = value[:, [OUTCOMES.index(o) for o in VALUE_PRIORITY]]
+    df['value_bet'] = np.where(flagged.any(axis=1), np.array(VALUE_PRIORITY)[flagged.argmax(axis=1)], '')
+    return df
+
+
+def export_window(date_from, days):
+    return predict_fixtures(*load_window(date_from, days))
+
+
+def resolve_format(path, fmt=None):
+    """Format demandé, sinon déduit de l'extension ('-' = sortie standard, CSV par défaut). ValueError s'il ne s'écrit pas."""
+    fmt = fmt or (os.path.splitext(path)[1].lstrip('.').lower() if path != '-' else 'csv')
+    if fmt not in FORMATS: raise ValueError(f"format inconnu : {fmt} ({', '.join(FORMATS)})")
+    if path == '-' and fmt == 'parquet': raise ValueError("parquet ne s'écrit pas sur la sortie standard")
+    return fmt
+
+
+def write(df, path, fmt=None):
+    fmt = resolve_format(path, fmt)
+    if path == '-':
+        path = sys.stdout
+    elif os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if fmt == 'parquet': df.to_parquet(path, index=False)
+    elif fmt == 'csv': df.to_csv(path, index=False)
+    else: df.to_json(path, orient='records', force_ascii=False, indent=1)
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--from", dest="date_from", default=datetime.now().strftime("%Y-%m-%d"))
+    window = p.add_mutually_exclusive_group()
+    window.add_argument("--days", type=int, default=1)
+    window.add_argument("--to", dest="date_to", help="dernière date incluse")
+    p.add_argument("-o", "--output", default="predictions.parquet")
+    p.add_argument("--format", choices=FORMATS, default=None)
+    args = p.parse_args(argv)
+
+    days = args.days
+    if args.date_to:
+        start, end = (datetime.strptime(d, "%Y-%m-%d") for d in (args.date_from, args.date_to))
+        days = (end - start).days + 1
+    if days < 1: p.error("plage de dates vide")
+    # Vérifié avant tout appel API : une sortie impossible ne doit rien consommer
+    try: fmt = resolve_format(args.output, args.format)
+    except ValueError as e: p.error(str(e))
+
+    t0 = time.perf_counter()
+    df = export_window(args.date_from, days)
+    write(df, args.output, fmt)
+    n_value = int((df['value_bet'] != '').sum()) if len(df) else 0
+    print(f"{len(df)} matchs, {n_value} value bets, exportés en {time.perf_counter() - t0:.2f}s -> {args.output}",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""Gouverneur de quota API-sports : point de passage unique de tous les appels réseau.
+
+- coalescence : N sessions qui demandent la même ressource au même moment => 1 requête
+- seau à jetons recalé sur les en-têtes de rate-limit renvoyés par l'API
+- retry avec backoff exponentiel (erreurs réseau, 429, 5xx, corps invalide)
+- mode dégradé explicite quand le quota du jour est épuisé ou que l'API ne répond plus
+"""
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from throttle import TokenBucket
+
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+DEFAULT_RPM = float(os.environ.get("API_SPORTS_RPM", 30))
+# Rafale admise avant que les en-têtes X-RateLimit-* recalent le seau : au moins le
+# fan-out du catalogue (une requête par ligue de TOP_LEAGUES, en parallèle)
+INITIAL_BURST = 10
+QUOTA_REASON = "Quota API-sports du jour épuisé"
+
+
+class ApiError(Exception):
+    pass
+
+
+class QuotaExhausted(ApiError):
+    pass
+
+
+class ApiUnavailable(ApiError):
+    pass
+
+
+class _Flight:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _header_int(headers, name):
+    try: return int(headers.get(name))
+    except (TypeError, ValueError): return None
+
+
+def _next_utc_midnight():
+    now = datetime.now(timezone.utc)
+    return (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+class QuotaGovernor:
+    def __init__(self, rpm=DEFAULT_RPM):
+        self.bucket = TokenBucket(rate=rpm / 60, capacity=max(INITIAL_BURST, rpm / 6))
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._exhausted_until = 0
+        self._degraded_reason = None
+        self._limits = {"daily_remaining": None, "minute_limit": None, "minute_remaining": None}
+        self._counters = {"sent": 0, "coalesced": 0, "retries": 0, "failures": 0}
+
+    # --- Coalescence ---
+    def call(self, key, send):
+        """Exécute `send()` (-> requests.Response) sous contrôle du gouverneur, renvoie le JSON."""
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader: flight = self._inflight[key] = _Flight()
+            else: self._counters["coalesced"] += 1
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None: raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._send_with_retry(send)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock: del self._inflight[key]
+            flight.event.set()
+        return flight.result
+
+    # --- Envoi, retry et lecture des quotas ---
+    def _send_with_retry(self, send):
+        if time.time() < self._exhausted_until:
+            raise QuotaExhausted(QUOTA_REASON)
+
+        for attempt in range(MAX_ATTEMPTS):
+            if attempt:
+                with self._lock: self._counters["retries"] += 1
+            self.bucket.acquire()
+            delay = BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE)
+            try:
+                with self._lock: self._counters["sent"] += 1
+                resp = send()
+            except requests.RequestException:
+                # Réseau, timeout, réponse tronquée ou mal encodée, redirections en boucle...
+                time.sleep(delay)
+                continue
+
+            self._observe(resp.headers)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                retry_after = _header_int(resp.headers, "Retry-After")
+                time.sleep(retry_after if retry_after is not None else delay)
+                continue
+
+            try: body = resp.json()
+            except (ValueError, requests.RequestException): body = None
+            if not isinstance(body, dict):
+                time.sleep(delay)
+                continue
+
+            errors = body.get('errors')
+            if isinstance(errors, dict):
+                if 'requests' in errors:
+                    # Limite journalière atteinte : plus aucun appel jusqu'au reset (minuit UTC)
+                    self._exhausted_until = _next_utc_midnight()
+                    self._set_degraded(QUOTA_REASON)
+                    raise QuotaExhausted(str(errors['requests']))
+                if 'rateLimit' in errors:
+                    time.sleep(max(delay, 60 / max(1, self._limits["minute_limit"] or 10)))
+                    continue
+            # Réponse valide mais dernier appel du quota (x-ratelimit-requests-remaining: 0) : reste dégradé
+            if time.time() >= self._exhausted_until: self._set_degraded(None)
+            return body
+
+        with self._lock: self._counters["failures"] += 1
+        self._set_degraded("API-sports ne répond pas, données en cache affichées")
+        raise ApiUnavailable("API-sports indisponible après plusieurs tentatives")
+
+    def _observe(self, headers):
+        daily = _header_int(headers, "x-ratelimit-requests-remaining")
+        minute_limit = _header_int(headers, "X-RateLimit-Limit")
+        minute_remaining = _header_int(headers, "X-RateLimit-Remaining")
+        with self._lock:
+            if daily is not None: self._limits["daily_remaining"] = daily
+            if minute_limit is not None: self._limits["minute_limit"] = minute_limit
+            if minute_remaining is not None: self._limits["minute_remaining"] = minute_remaining
+        if minute_limit:
+            self.bucket.update(rate=minute_limit / 60, capacity=max(1, minute_limit / 6), available=minute_remaining)
+        if daily == 0:
+            self._exhausted_until = _next_utc_midnight()
+            self._set_degraded(QUOTA_REASON)
+
+    def _set_degraded(self, reason):
+        with self._lock: self._degraded_reason = reason
+
+    def status(self):
+        with self._lock:
+            exhausted = time.time() < self._exhausted_until
+            reason = self._degraded_reason or (QUOTA_REASON if exhausted else None)
+            return {
+                "degraded": reason is not None,
+                "reason": reason,
+                "quota_exhausted": exhausted,
+                **self._limits,
+                **self._counters,
+            }
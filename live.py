@@ -0,0 +1,144 @@
+"""Mode direct : un seul poller par processus, quel que soit le nombre de sessions.
+
+LiveBoard interroge l'endpoint des matchs en cours toutes les `interval` secondes,
+compare au relevé précédent (score, minute, statut) et ne recalcule que les matchs
+qui ont bougé : probabilités in-play sur le temps restant (score_matrix.in_play_markets).
+Chaque entrée porte le numéro de version du relevé où elle a changé ; une session qui
+a déjà affiché la version N ne traite que les entrées plus récentes.
+
+Pas d'appel API sans spectateur ni match possiblement en cours : le poller se met en
+veille quand plus aucune session n'a ouvert le direct depuis `idle_after` secondes ou
+quand aucun coup d'envoi connu ne tombe dans la fenêtre de jeu.
+"""
+import os
+import threading
+import time
+
+import metrics
+import sports_api
+from model import build_team_index, calculate_live_probabilities, calculate_true_stats
+
+LIVE_INTERVAL = int(os.environ.get("LIVE_INTERVAL", 60))
+IDLE_AFTER = 300
+# Un match commencé il y a plus longtemps que ça est forcément terminé (prolongations comprises)
+MATCH_WINDOW = 150 * 60
+# Durée d'affichage d'un match terminé après sa sortie du flux direct
+FINISHED_KEEP = 30 * 60
+
+
+def _state_of(fixture):
+    return fixture.goals_home, fixture.goals_away, fixture.elapsed, fixture.status
+
+
+class LiveBoard:
+    def __init__(self, interval=LIVE_INTERVAL, idle_after=IDLE_AFTER):
+        self.interval = interval
+        self.idle_after = idle_after
+        self.version = 0
+        self.polled_at = None
+        self._entries = {}      # fixture_id -> {'fixture', 'probs', 'version', 'finished_at'}
+        self._stats = {}        # fixture_id -> (stats_h, stats_a), calculées une fois par match
+        self._kickoffs = set()
+        self._seen_at = float("-inf")
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="live", daemon=True)
+            self._thread.start()
+        return self
+
+    def touch(self):
+        """Signale qu'une session regarde le direct (réveille le poller s'il était en veille)."""
+        idle = time.monotonic() - self._seen_at > self.idle_after
+        self._seen_at = time.monotonic()
+        if idle: self._wake.set()
+
+    def _loop(self):
+        while True:
+            try:
+                if self.should_poll():
+                    with self._poll_lock: self.poll_once()
+            except Exception: pass
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def ensure_polled(self):
+        """Premier spectateur : relevé immédiat plutôt que d'attendre le prochain tour du poller."""
+        if self.polled_at is not None: return
+        with self._poll_lock:
+            if self.polled_at is None: self.poll_once()
+
+    def should_poll(self, now=None):
+        if time.monotonic() - self._seen_at > self.idle_after: return False
+        if self.polled_at is None: return True
+        now = now or time.time()
+        with self._lock:
+            if any(e['finished_at'] is None for e in self._entries.values()): return True
+        # Coups d'envoi retenus du catalogue (qui ne garde plus les matchs une fois commencés)
+        try:
+            for day in sports_api.fetch_catalog_window(time.strftime("%Y-%m-%d"), sports_api.CATALOG_DAYS).values():
+                self._kickoffs.update(f.timestamp for f in day)
+        except Exception: pass
+        self._kickoffs = {ts for ts in self._kickoffs if ts > now - MATCH_WINDOW}
+        return any(ts <= now + self.interval for ts in self._kickoffs)
+
+    def _team_stats(self, fixtures):
+        missing = [f for f in fixtures if f.id not in self._stats]
+        indexes = {lid: build_team_index(sports_api.fetch_standings(lid)) for lid in {f.league_id for f in missing}}
+        for f in missing:
+            index = indexes[f.league_id]
+            self._stats[f.id] = (calculate_true_stats(f.home.id, f.home.name, index),
+                                 calculate_true_stats(f.away.id, f.away.name, index))
+        return [self._stats[f.id] for f in fixtures]
+
+    def poll_once(self, now=None):
+        """Un relevé : renvoie les ids des matchs modifiés (nouveaux, score/minute/statut, terminés)."""
+        now = now or time.time()
+        fixtures = sports_api.fetch_live()
+        metrics.inc("live_polls_total")
+        self.polled_at = now
+        if fixtures is None: return []  # API indisponible : on garde le dernier relevé
+
+        with self._lock:
+            previous = self._entries
+        changed = [f for f in fixtures if f.id not in previous or _state_of(previous[f.id]['fixture']) != _state_of(f)]
+        live_ids = {f.id for f in fixtures}
+
+        probs = {}
+        if changed:
+            stats = self._team_stats(changed)
+            table = calculate_live_probabilities(
+                [s[0]['xg'] for s in stats], [s[1]['xg'] for s in stats],
+                [f.elapsed or 0 for f in changed], [f.goals_home or 0 for f in changed], [f.goals_away or 0 for f in changed],
+            )
+            probs = {f.id: {k: int(v[i]) for k, v in table.items()} for i, f in enumerate(changed)}
+
+        with self._lock:
+            version = self.version + 1
+            entries = dict(self._entries)
+            for f in changed:
+                entries[f.id] = {'fixture': f, 'probs': probs[f.id], 'version': version, 'finished_at': None}
+            finished = [fid for fid, e in entries.items() if fid not in live_ids and e['finished_at'] is None]
+            for fid in finished:
+                entries[fid] = {**entries[fid], 'version': version, 'finished_at': now}
+            for fid in [fid for fid, e in entries.items() if e['finished_at'] and now - e['finished_at'] > FINISHED_KEEP]:
+                del entries[fid]
+                self._stats.pop(fid, None)
+            if changed or finished:
+                self.version = version
+            self._entries = entries
+        metrics.inc("live_changes_total", len(changed) + len(finished))
+        return [f.id for f in changed] + finished
+
+    def snapshot(self):
+        """(version, entrées triées par coup d'envoi). Les entrées ne sont jamais modifiées en place."""
+        with self._lock:
+            return self.version, sorted(self._entries.values(), key=lambda e: e['fixture'].timestamp)
+
+    def entry(self, fixture_id):
+        with self._lock:
+            return self._entries.get(fixture_id)
@@ -0,0 +1,139 @@
+"""Compteurs et chronos du processus, exportés au format texte Prometheus.
+
+    with metrics.timer("view_render_seconds", view="home"): ...
+    @metrics.timed("calculate_probabilities")
+    metrics.inc("api_bytes_total", len(body), endpoint="/odds")
+
+METRICS_PORT=9108 expose GET /metrics via start_http_server().
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "predictech_"
+BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRICS_PORT = int(os.environ.get("METRICS_PORT", 0))
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_collectors = []
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    k = _key(name, labels)
+    with _lock: _counters[k] = _counters.get(k, 0) + value
+
+
+def observe(name, value, **labels):
+    k = _key(name, labels)
+    with _lock:
+        h = _histograms.get(k)
+        if h is None: h = _histograms[k] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound: h[i] += 1
+        h[-2] += value
+        h[-1] += 1
+
+
+@contextmanager
+def timer(name, **labels):
+    t0 = time.perf_counter()
+    try: yield
+    finally: observe(name, time.perf_counter() - t0, **labels)
+
+
+def timed(function_name):
+    """Chronomètre chaque appel dans function_seconds{function=...}."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer("function_seconds", function=function_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def register_collector(collect):
+    """`collect()` -> [(nom, type, labels, valeur)] lu à chaque export (état tenu ailleurs)."""
+    with _lock: _collectors.append(collect)
+
+
+def _fmt_labels(labels):
+    if not labels: return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in labels) + "}"
+
+
+def render():
+    """Toutes les séries au format d'exposition texte Prometheus."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        collectors = list(_collectors)
+
+    samples = {}
+    for (name, labels), value in counters.items():
+        samples.setdefault((name, "counter"), []).append((_fmt_labels(labels), value))
+    for collect in collectors:
+        try:
+            for name, kind, labels, value in collect():
+                samples.setdefault((name, kind), []).append((_fmt_labels(sorted(labels.items())), value))
+        except Exception:
+            pass
+
+    lines = []
+    for (name, kind), rows in sorted(samples.items()):
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+        lines.extend(f"{PREFIX}{name}{labels} {value}" for labels, value in rows)
+
+    by_name = {}
+    for (name, labels), h in histograms.items():
+        by_name.setdefault(name, []).append((labels, h))
+    for name, series in sorted(by_name.items()):
+        lines.append(f"# TYPE {PREFIX}{name} histogram")
+        for labels, h in series:
+            for bound, count in zip(BUCKETS, h):
+                lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels + (('le', bound),))} {count}")
+            lines.append(f"{PREFIX}{name}_bucket{_fmt_labels(labels + (('le', '+Inf'),))} {h[-1]}")
+            lines.append(f"{PREFIX}{name}_sum{_fmt_labels(labels)} {h[-2]:.6f}")
+            lines.append(f"{PREFIX}{name}_count{_fmt_labels(labels)} {h[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def timings_table():
+    """[{'metric', 'labels', 'count', 'avg_ms', 'total_s'}] trié par temps cumulé (panneau admin)."""
+    with _lock:
+        items = [(name, dict(labels), h[-1], h[-2]) for (name, labels), h in _histograms.items()]
+    rows = [{"metric": name, "labels": ", ".join(f"{k}={v}" for k, v in labels.items()), "count": count,
+             "avg_ms": round(total / count * 1000, 2) if count else 0.0, "total_s": round(total, 3)}
+            for name, labels, count, total in items]
+    return sorted(rows, key=lambda r: -r["total_s"])
+
+
+def start_http_server(port=METRICS_PORT, host="0.0.0.0"):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *a): pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,139 @@
+"""Modèle de prédiction : stats d'équipe, probabilités 1X2 / buts et détection de value.
+
+Sans Streamlit : utilisable par l'app comme par les traitements de fond.
+"""
+import numpy as np
+
+import metrics
+import ratings
+from score_matrix import goal_markets, in_play_markets
+
+
+# --- MATHS ---
+@metrics.timed("calculate_goals_probabilities")
+def calculate_goals_probabilities(xg_h, xg_a, elapsed=None, goals_h=0, goals_a=0):
+    """(Over 2.5 %, BTTS %) ; avec `elapsed` (minutes jouées), sur le temps restant à partir du score actuel."""
+    if elapsed is None:
+        markets = goal_markets([xg_h], [xg_a])
+        return int(markets['over'][2.5][0] * 100), int(markets['btts'][0] * 100)
+    markets = in_play_markets([xg_h], [xg_a], [elapsed], [goals_h], [goals_a])
+    return int(markets['over25'][0] * 100), int(markets['btts'][0] * 100)
+
+@metrics.timed("calculate_live_probabilities")
+def calculate_live_probabilities(xg_h, xg_a, elapsed, goals_h, goals_a):
+    """Version tableau pour le direct : dict de tableaux d'entiers % (home, draw, away, over25, btts)."""
+    markets = in_play_markets(xg_h, xg_a, elapsed, goals_h, goals_a)
+    return {k: np.trunc(v * 100).astype(int) for k, v in markets.items()}
+
+
+# --- CALCUL DES STATS ---
+def get_fallback_stats(team_name, team_id=None):
+    """Stats estimées quand le classement ne connaît pas l'équipe : notes issues des derniers résultats."""
+    if team_id is None: return ratings.stats_for_unknown(team_name)
+    return ratings.get_table().stats(team_id, team_name)
+
+def team_record(team_data):
+    played = team_data['all']['played']
+    goals_for = team_data['all']['goals']['for']
+    goals_against = team_data['all']['goals']['against']
+    form = team_data.get('form') or ''
+
+    avg_gf = goals_for / played
+    avg_ga = goals_against / played
+
+    return {
+        'atk': min(100, int((avg_gf / 2.5) * 100)),
+        'def': max(10, min(100, int(100 - ((avg_ga / 2.0) * 100)))),
+        'xg': round(avg_gf, 2),
+        'form_str': form,
+        'rank': team_data.get('rank', '-'),
+        'dyn': int((sum([3 if r == 'W' else 1 if r == 'D' else 0 for r in form]) / (len(form) * 3)) * 100) if form else 70,
+        'is_fallback': False,
+    }
+
+@metrics.timed("build_team_index")
+def build_team_index(standings_data):
+    """team_id -> stats pour toutes les équipes d'un classement, en une passe."""
+    index = {}
+    if not standings_data: return index
+    try:
+        # Tous les groupes (indispensable pour les coupes d'Europe)
+        for group in standings_data[0]['league']['standings']:
+            for team_data in group:
+                if team_data['all']['played'] > 0 and team_data['team']['id'] not in index:
+                    index[team_data['team']['id']] = team_record(team_data)
+    except (KeyError, IndexError, TypeError, ZeroDivisionError): pass
+    return index
+
+@metrics.timed("calculate_true_stats")
+def calculate_true_stats(team_id, team_name, team_index):
+    stats = team_index.get(team_id) if team_index else None
+    return stats if stats is not None else get_fallback_stats(team_name, team_id)
+
+@metrics.timed("calculate_probabilities")
+def calculate_probabilities(stats_h, stats_a):
+    power_h = stats_h['atk'] + stats_h['def'] + stats_h['dyn'] + 10
+    power_a = stats_a['atk'] + stats_a['def'] + stats_a['dyn']
+    if power_h == 0 and power_a == 0: return 33, 34, 33
+
+    diff = power_h - power_a
+    prob_h = max(5, min(90, int(45 + (diff * 0.4))))
+    prob_a = max(5, min(90, int(30 - (diff * 0.4))))
+    return prob_h, 100 - prob_h - prob_a, prob_a
+
+def probabilities_from_power(power_h, power_a):
+    """Cœur vectorisé de calculate_probabilities sur des tableaux de puissances (bonus domicile inclus)."""
+    power_h = np.asarray(power_h, dtype=float)
+    power_a = np.asarray(power_a, dtype=float)
+    diff = power_h - power_a
+    prob_h = np.clip(np.trunc(45 + diff * 0.4), 5, 90).astype(int)
+    prob_a = np.clip(np.trunc(30 - diff * 0.4), 5, 90).astype(int)
+    prob_n = 100 - prob_h - prob_a
+    empty = (power_h == 0) & (power_a == 0)
+    prob_h[empty], prob_n[empty], prob_a[empty] = 33, 34, 33
+    return prob_h, prob_n, prob_a
+
+@metrics.timed("calculate_probabilities_batch")
+def calculate_probabilities_batch(stats_h_list, stats_a_list):
+    """Version tableau de calculate_probabilities : trois tableaux d'entiers (n,)."""
+    power_h = [s['atk'] + s['def'] + s['dyn'] + 10 for s in stats_h_list]
+    power_a = [s['atk'] + s['def'] + s['dyn'] for s in stats_a_list]
+    return probabilities_from_power(power_h, power_a)
+
+# Seuils de value (proba modèle / proba juste du marché) par issue : 1, N, 2
+VALUE_THRESHOLDS = {'Home': 1.05, 'Draw': 1.10, 'Away': 1.05}
+# Marchés buts (Over 2.5, BTTS) : même exigence que les victoires sèches
+GOALS_VALUE_THRESHOLD = 1.05
+
+def market_fair(offered, fair=None):
+    """Proba juste par issue, tableaux (n, k) d'un même marché : consensus sans marge quand il existe,
+    sinon cotes proposées marge retirée, sinon (marché incomplet) simplement 1/cote."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        implied = 1.0 / np.asarray(offered, dtype=float)
+        own = implied / implied.sum(axis=-1, keepdims=True)
+    own = np.where(np.isnan(own), implied, own)
+    return own if fair is None else np.where(np.isnan(fair), own, fair)
+
+def value_flags(probs, offered, fair, thresholds):
+    """Value = proba modèle au-dessus de la proba juste du marché (x seuil) ET cote proposée encore
+    gagnante (cote x proba > 1). Tableaux (n, k), NaN = pas de cote."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (np.nan_to_num(probs / fair) > thresholds) & (np.nan_to_num(probs * offered) > 1.0)
+
+@metrics.timed("detect_value_bet")
+def detect_value_bet(prob_h, prob_n, prob_a, odds_dict, home_name, away_name, fair=None):
+    """`fair` : probabilités sans marge du consensus multi-bookmakers ({'Home','Draw','Away'}) ;
+    à défaut, celles des cotes proposées (odds_dict), marge retirée."""
+    outcomes = ('Home', 'Draw', 'Away')
+    try: offered = np.array([float(odds_dict.get(o) or 0) for o in outcomes])
+    except (TypeError, ValueError): return ""
+    offered[offered <= 0] = np.nan
+    fair_probs = market_fair(offered, np.array([(fair or {}).get(o, np.nan) for o in outcomes]))
+    probs = np.array([prob_h, prob_n, prob_a]) / 100
+    flags = value_flags(probs, offered, fair_probs, np.array([VALUE_THRESHOLDS[o] for o in outcomes]))
+
+    # Priorité inchangée : 1, puis 2, puis N
+    if flags[0]: return f"🔥 VALUE BET DÉTECTÉE : VICTOIRE {home_name.upper()} (Cote {offered[0]:.2f})"
+    if flags[2]: return f"🔥 VALUE BET DÉTECTÉE : VICTOIRE {away_name.upper()} (Cote {offered[2]:.2f})"
+    if flags[1]: return f"🔥 VALUE BET DÉTECTÉE : MATCH NUL (Cote {offered[1]:.2f})"
+    return ""
@@ -0,0 +1,123 @@
+"""Agrégation des cotes de tous les bookmakers en tableaux NumPy.
+
+Une passe sur la réponse /odds (tous bookmakers, marchés 1X2, +/- 2.5 buts et BTTS)
+remplit un tableau prix[match, bookmaker, issue] ; tout le reste est vectorisé :
+meilleure cote, cote médiane (consensus), marge moyenne par marché et probabilités
+sans marge (chaque bookmaker normalisé sur son marché, puis moyenne).
+"""
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import metrics
+
+OUTCOMES = ('Home', 'Draw', 'Away', 'Over 2.5', 'Under 2.5', 'Yes', 'No')
+# (id du pari API-sports, libellé de l'issue) -> colonne
+_COLUMN = {(1, 'Home'): 0, (1, 'Draw'): 1, (1, 'Away'): 2, (5, 'Over 2.5'): 3, (5, 'Under 2.5'): 4, (8, 'Yes'): 5, (8, 'No'): 6}
+MARKETS = {'1X2': slice(0, 3), 'O/U 2.5': slice(3, 5), 'BTTS': slice(5, 7)}
+
+
+def _summarize(prices):
+    """prix (n, bookmakers, issues) -> (best, consensus, fair, margin, books)."""
+    with warnings.catch_warnings():
+        # Tranches entièrement vides (issue jamais cotée) : NaN attendu
+        warnings.simplefilter("ignore", RuntimeWarning)
+        best = np.nanmax(prices, axis=1)
+        consensus = np.nanmedian(prices, axis=1)
+        implied = 1.0 / prices
+        fair = np.full(prices.shape, np.nan)
+        margins = []
+        for cols in MARKETS.values():
+            # Marché complet chez ce bookmaker uniquement, sinon la normalisation n'a pas de sens
+            book_total = implied[:, :, cols].sum(axis=2, keepdims=True)
+            fair[:, :, cols] = implied[:, :, cols] / book_total
+            margins.append(np.nanmean(book_total[:, :, 0], axis=1) - 1.0)
+        fair = np.nanmean(fair, axis=1)
+        for cols in MARKETS.values():
+            fair[:, cols] /= fair[:, cols].sum(axis=1, keepdims=True)
+    books = (~np.isnan(prices)).any(axis=2).sum(axis=1)
+    return best, consensus, fair, np.column_stack(margins) if margins else np.empty((len(prices), 0)), books
+
+
+class OddsTable:
+    """Résumé des cotes par match : une ligne par fixture id, une colonne par issue de OUTCOMES."""
+
+    def __init__(self, fixture_ids, best, consensus, fair, margin, books):
+        self.fixture_ids = np.asarray(fixture_ids, dtype=np.int64)
+        self.best, self.consensus, self.fair, self.margin, self.books = best, consensus, fair, margin, books
+        self._row = {int(fid): i for i, fid in enumerate(self.fixture_ids)}
+
+    @classmethod
+    def empty(cls):
+        n = len(OUTCOMES)
+        return cls([], np.empty((0, n)), np.empty((0, n)), np.empty((0, n)), np.empty((0, len(MARKETS))), np.empty(0, dtype=int))
+
+    @classmethod
+    def concat(cls, tables):
+        tables = [t for t in tables if len(t)]
+        if not tables: return cls.empty()
+        return cls(*(np.concatenate([getattr(t, f) for t in tables]) for f in ('fixture_ids', 'best', 'consensus', 'fair', 'margin', 'books')))
+
+    def __len__(self):
+        return len(self.fixture_ids)
+
+    def __contains__(self, fixture_id):
+        return fixture_id in self._row
+
+    def lookup(self, fixture_ids, field='best', outcomes=OUTCOMES[:3]):
+        """Tableau (len(fixture_ids), len(outcomes)), NaN pour les matchs ou issues sans cote."""
+        values = getattr(self, field)
+        cols = [OUTCOMES.index(o) for o in outcomes]
+        out = np.full((len(fixture_ids), len(cols)), np.nan)
+        rows = [(i, self._row[fid]) for i, fid in enumerate(fixture_ids) if fid in self._row]
+        if rows:
+            dst, src = np.array(rows).T
+            out[dst] = values[src][:, cols]
+        return out
+
+    def books_for(self, fixture_ids):
+        return np.array([self.books[self._row[fid]] if fid in self._row else 0 for fid in fixture_ids], dtype=int)
+
+    def get(self, fixture_id):
+        """Résumé d'un match : {'best', 'consensus', 'fair', 'margin', 'books'}, ou None sans cote."""
+        row = self._row.get(fixture_id)
+        if row is None: return None
+
+        def by_outcome(values):
+            return {o: float(v) for o, v in zip(OUTCOMES, values[row]) if not np.isnan(v)}
+        return {
+            'best': by_outcome(self.best), 'consensus': by_outcome(self.consensus), 'fair': by_outcome(self.fair),
+            'margin': {m: float(v) for m, v in zip(MARKETS, self.margin[row]) if not np.isnan(v)},
+            'books': int(self.books[row]),
+        }
+
+
+@metrics.timed("parse_odds")
+def parse_odds(items):
+    """Réponse /odds (liste `response`, toutes pages) -> OddsTable, en une passe."""
+    fixture_rows, book_cols = {}, {}
+    rows, books, cols, values = [], [], [], []
+    column = _COLUMN.get
+    for item in items:
+        try: fixture_id = item['fixture']['id']
+        except (KeyError, TypeError): continue
+        r = fixture_rows.setdefault(fixture_id, len(fixture_rows))
+        for bookmaker in item.get('bookmakers') or ():
+            b = book_cols.setdefault(bookmaker.get('id'), len(book_cols))
+            for bet in bookmaker.get('bets') or ():
+                bet_id = bet.get('id')
+                for v in bet.get('values') or ():
+                    c = column((bet_id, v.get('value')))
+                    if c is None: continue
+                    rows.append(r)
+                    books.append(b)
+                    cols.append(c)
+                    values.append(v.get('odd'))
+    if not fixture_rows: return OddsTable.empty()
+
+    prices = np.full((len(fixture_rows), max(1, len(book_cols)), len(OUTCOMES)), np.nan)
+    odds = pd.to_numeric(pd.Series(values, dtype=object), errors='coerce').to_numpy(dtype=float, copy=True)
+    odds[~(odds > 1.0)] = np.nan
+    prices[rows, books, cols] = odds
+    return OddsTable(list(fixture_rows), *_summarize(prices))
@@ -0,0 +1,200 @@
+"""Analyse IA (Groq) : client unique, streaming, cache des réponses et file d'attente.
+
+GROQ_BASE_URL permet de pointer le client vers un serveur de complétion local.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import metrics
+import sports_api
+from api_cache import make_key, ttl_for
+from throttle import TokenBucket
+
+MODEL = "llama-3.3-70b-versatile"
+CACHE_ENDPOINT = "/llm/chat"
+
+# Au plus N complétions simultanées, et un débit moyen compatible avec le quota Groq (req/min)
+MAX_CONCURRENT = int(os.environ.get("GROQ_MAX_CONCURRENCY", 4))
+REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_RPM", 30))
+QUEUE_TIMEOUT = 120
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+_state = {"api_key": os.environ.get("GROQ_API_KEY", ""), "base_url": os.environ.get("GROQ_BASE_URL"), "client": None}
+_lock = threading.Lock()
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT)
+_bucket = TokenBucket(rate=REQUESTS_PER_MINUTE / 60, capacity=max(1, MAX_CONCURRENT))
+
+
+class OracleBusy(Exception):
+    pass
+
+
+class _Flight:
+    """Complétion en cours, partagée par toutes les sessions qui demandent le même prompt."""
+
+    def __init__(self):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self._cond = threading.Condition()
+
+    def push(self, part):
+        with self._cond:
+            self.parts.append(part)
+            self._cond.notify_all()
+
+    def finish(self, error=None):
+        with self._cond:
+            self.done, self.error = True, error
+            self._cond.notify_all()
+
+    def follow(self):
+        """Tous les morceaux depuis le début, puis les suivants au fil de l'eau."""
+        sent = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self.parts) > sent or self.done)
+                new, done, error = self.parts[sent:], self.done, self.error
+            sent += len(new)
+            yield from new
+            if done and sent == len(self.parts):
+                if error is not None: raise error
+                return
+
+
+def configure(api_key, base_url=None):
+    with _lock:
+        base_url = base_url or _state["base_url"]
+        if api_key == _state["api_key"] and base_url == _state["base_url"]: return
+        _state.update(api_key=api_key, base_url=base_url, client=None)
+
+
+def get_client():
+    with _lock:
+        if _state["client"] is None:
+            # Import différé : ~0.3 s au démarrage, inutile tant qu'aucune analyse n'est demandée
+            from groq import Groq
+            _state["client"] = Groq(api_key=_state["api_key"], base_url=_state["base_url"])
+        return _state["client"]
+
+
+def build_prompt(home, away, stats_h, stats_a, odds, value_msg, h2h_data):
+    h2h_text = "Historique récent : " + ", ".join([f"{f.home.name} {f.goals_home}-{f.goals_away} {f.away.name}" for f in h2h_data]) if h2h_data else "Pas d'historique."
+
+    return f"""Tu es un algorithme de prédiction mathématique de paris sportifs.
+    Analyse ce match : {home} vs {away}.
+
+    DATA :
+    - {home} (Dom) : Classement: {stats_h['rank']}, Attaque {stats_h['atk']}/100, Défense {stats_h['def']}/100, Forme {stats_h['dyn']}/100, Buts/match {stats_h['xg']}.
+    - {away} (Ext) : Classement: {stats_a['rank']}, Attaque {stats_a['atk']}/100, Défense {stats_a['def']}/100, Forme {stats_a['dyn']}/100, Buts/match {stats_a['xg']}.
+    {h2h_text}
+
+    COTES ACTUELLES : 1 ({odds.get('Home', '-')}) | X ({odds.get('Draw', '-')}) | 2 ({odds.get('Away', '-')})
+    Mathématiques : {value_msg if value_msg else "Pas de Value flagrante sur le résultat sec."}
+
+    CONSIGNES :
+    1. Base-toi sur les stats, l'historique et l'enjeu (classement).
+    2. Sois direct, factuel et précis. Pas de blabla.
+    3. VARIE TES PROPOSITIONS d'un match à l'autre.
+
+    DONNE 3 CHOIX DE PARIS :
+    1. 🟢 PARI SAFE : Un pari hyper probable (Double Chance, Over/Under, etc.). Justifie.
+    2. 🟡 PARI AUDACIEUX : Une cote intéressante appuyée par la stat dominante (Handicap, Buteur probable, Mi-temps...).
+    3. 🔴 COUP DE POKER : Score exact ou scénario pointu basé sur la data.
+    """
+
+
+def prompt_key(home, away, stats_h, stats_a, odds, value_msg, h2h_data):
+    """Empreinte des entrées normalisées : mêmes équipes, stats, cotes et H2H => même réponse en cache."""
+    def norm_odd(v):
+        try: return f"{float(v):.2f}"
+        except (TypeError, ValueError): return "-"
+
+    fields = ('rank', 'atk', 'def', 'dyn', 'xg')
+    payload = {
+        "model": MODEL,
+        "teams": [home, away],
+        "stats": [[str(s.get(k)) for k in fields] for s in (stats_h, stats_a)],
+        "odds": [norm_odd(odds.get(k)) for k in ('Home', 'Draw', 'Away')],
+        "value": value_msg or "",
+        "h2h": [[f.home.name, f.goals_home, f.goals_away, f.away.name] for f in h2h_data or []],
+    }
+    digest = hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return make_key(CACHE_ENDPOINT, {"h": digest})
+
+
+def cached_prediction(key):
+    cache = sports_api.get_cache()
+    cached = cache.get(key)
+    if cached is not None and cached[1] < ttl_for(CACHE_ENDPOINT)[0]:
+        cache.count(CACHE_ENDPOINT, "hit")
+        return cached[0]['text']
+    cache.count(CACHE_ENDPOINT, "miss")
+    return None
+
+
+def stream_prediction(home, away, stats_h, stats_a, odds, value_msg, h2h_data):
+    """Génère le texte de l'analyse morceau par morceau (réponse en cache : un seul morceau).
+
+    Un seul appel Groq par prompt à la fois : les sessions qui demandent la même analyse
+    pendant qu'elle est générée suivent le même flux.
+    """
+    key = prompt_key(home, away, stats_h, stats_a, odds, value_msg, h2h_data)
+    text = cached_prediction(key)
+    if text is not None:
+        metrics.inc("llm_requests_total", cached="true")
+        yield text
+        return
+
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader: flight = _inflight[key] = _Flight()
+    metrics.inc("llm_requests_total", cached="false" if leader else "coalesced")
+    if leader:
+        # Complétion dans son propre thread : elle va au bout (et en cache) même si la session décroche
+        prompt = build_prompt(home, away, stats_h, stats_a, odds, value_msg, h2h_data)
+        threading.Thread(target=_complete, args=(key, prompt, flight), name="oracle", daemon=True).start()
+    yield from flight.follow()
+
+
+def _complete(key, prompt, flight):
+    error = None
+    try:
+        # File d'attente : on attend un créneau plutôt que d'échouer sous une rafale
+        if not _slots.acquire(timeout=QUEUE_TIMEOUT):
+            raise OracleBusy("Trop d'analyses en cours, réessaie dans un instant.")
+        try:
+            _bucket.acquire()
+            t0 = time.perf_counter()
+            stream = get_client().chat.completions.create(
+                model=MODEL, messages=[{"role": "user", "content": prompt}], temperature=0.5, stream=True
+            )
+            usage = None
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                # Groq joint l'usage au dernier morceau du flux (x_groq.usage)
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                if delta:
+                    if not flight.parts: metrics.observe("llm_first_token_seconds", time.perf_counter() - t0)
+                    flight.push(delta)
+            metrics.observe("llm_completion_seconds", time.perf_counter() - t0)
+            metrics.inc("llm_tokens_total", getattr(usage, "completion_tokens", None) or len(flight.parts), kind="completion")
+            if usage is not None: metrics.inc("llm_tokens_total", usage.prompt_tokens, kind="prompt")
+        finally:
+            _slots.release()
+        sports_api.get_cache().set(key, CACHE_ENDPOINT, {"text": "".join(flight.parts), "created": time.time()})
+    except Exception as e:
+        error = e
+    finally:
+        # Retiré après l'écriture en cache : un nouvel appel trouve soit le vol en cours, soit le cache
+        with _inflight_lock: _inflight.pop(key, None)
+        flight.finish(error)
+
+
+def get_ai_prediction(home, away, stats_h, stats_a, odds, value_msg, h2h_data):
+    return "".join(stream_prediction(home, away, stats_h, stats_a, odds, value_msg, h2h_data))
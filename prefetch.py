@@ -0,0 +1,101 @@
+"""Préchauffage des caches pour les matchs à venir.
+
+Intègre les résultats du jour et de la veille aux notes d'équipes (ratings.py), puis
+parcourt les matchs des prochaines `hours` heures par ordre de coup d'envoi et remplit
+le cache disque (classements, cotes groupées, H2H) avant l'arrivée des utilisateurs,
+sans dépasser un budget d'appels API par passage. Tourne dans l'app (thread daemon)
+ou à côté : `python prefetch.py` avec API_SPORTS_KEY dans l'environnement.
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import ratings
+import sports_api
+
+DEFAULT_HOURS = int(os.environ.get("PREFETCH_HOURS", 72))
+DEFAULT_BUDGET = int(os.environ.get("PREFETCH_BUDGET", 100))
+DEFAULT_INTERVAL = int(os.environ.get("PREFETCH_INTERVAL", 1800))
+# Mettre à 0 quand `python prefetch.py` tourne à côté de l'app
+IN_APP = os.environ.get("PREFETCH_IN_APP", "1") == "1"
+
+
+def upcoming_fixtures(hours, now=None):
+    now = now or datetime.now()
+    # Même fenêtre (donc mêmes clés de cache) que le catalogue de l'app
+    catalog = sports_api.fetch_catalog_window(now.strftime("%Y-%m-%d"), sports_api.CATALOG_DAYS)
+    horizon = (now + timedelta(hours=hours)).timestamp()
+    fixtures = [f for day in catalog.values() for f in day if now.timestamp() <= f.timestamp <= horizon]
+    return sorted(fixtures, key=lambda f: f.timestamp)
+
+
+def plan_tasks(fixtures):
+    """Tâches dédoublonnées, dans l'ordre des coups d'envoi : (nom, fonction, arguments)."""
+    tasks, seen = [], set()
+    for f in fixtures:
+        for task in (
+            ("standings", sports_api.fetch_standings, (f.league_id,)),
+            ("odds", sports_api.fetch_odds_for_date, (f.day,)),
+            ("h2h", sports_api.fetch_h2h, (f.home.id, f.away.id)),
+        ):
+            if (task[0], task[2]) not in seen:
+                seen.add((task[0], task[2]))
+                tasks.append(task)
+    return tasks
+
+
+class Prefetcher:
+    """Passe de préchauffage toutes les `interval` secondes, `budget` appels réseau maximum par passe.
+
+    Le budget compte tous les appels du processus pendant la passe (utilisateurs compris) :
+    on s'arrête dès qu'il est atteint, les matchs les plus lointains attendront la passe suivante.
+    Le scanner de value bets (scanner.ValueScanner) relit ce que la passe a mis en cache.
+    """
+
+    def __init__(self, hours=DEFAULT_HOURS, budget=DEFAULT_BUDGET, interval=DEFAULT_INTERVAL):
+        self.hours = hours
+        self.budget = budget
+        self.interval = interval
+        self.last_run = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="prefetch", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            try: self.run_once()
+            except Exception: pass
+            time.sleep(self.interval)
+
+    def run_once(self):
+        start_calls = sports_api.network_calls()
+        def spent(): return sports_api.network_calls() - start_calls
+
+        try: rated = ratings.refresh()
+        except Exception: rated = 0
+        fixtures = upcoming_fixtures(self.hours)
+        tasks = plan_tasks(fixtures)
+        done = 0
+        for name, func, args in tasks:
+            if spent() >= self.budget: break
+            try: func(*args)
+            except Exception: pass
+            done += 1
+
+        self.last_run = {
+            "at": datetime.now(), "fixtures": len(fixtures), "tasks": len(tasks),
+            "done": done, "rated": rated, "api_calls": spent(),
+        }
+        return self.last_run
+
+
+if __name__ == "__main__":
+    prefetcher = Prefetcher()
+    while True:
+        print(prefetcher.run_once(), flush=True)
+        time.sleep(prefetcher.interval)
@@ -0,0 +1,238 @@
+"""Notes attaque/défense des équipes, mises à jour match par match.
+
+Sert quand le classement ne dit rien d'une équipe (début de saison, coupes, équipes
+hors TOP_LEAGUES). Chaque résultat terminé corrige les notes des deux équipes d'un pas
+de type Poisson : attaque = buts marqués attendus, défense = buts encaissés attendus,
+ajustés de la force de l'adversaire. Table en tableaux NumPy indexés par team id
+(lookup O(1)), partagée par tous les threads et persistée en .npz (RATINGS_PATH).
+Les matchs déjà comptés ne sont retenus que sur SEEN_RETENTION : un résultat plus
+ancien que cet horizon est ignoré plutôt que compté deux fois.
+
+    python ratings.py --days 30     # rattrapage des résultats des 30 derniers jours
+"""
+import argparse
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import metrics
+import sports_api
+
+RATINGS_PATH = os.environ.get(
+    "RATINGS_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "ratings.npz")
+)
+LEAGUE_AVG_GOALS = 1.35
+HOME_FACTOR = 1.15
+# Pas d'apprentissage : ~10 matchs pour oublier l'a priori
+LEARNING_RATE = 0.1
+RATING_BOUNDS = (0.2, 4.0)
+FORM_LENGTH = 5
+# Fenêtre des matchs déjà comptés (fixture id -> coup d'envoi), largement au-delà d'un rattrapage --days 30
+SEEN_RETENTION = 60 * 86400
+
+# A priori des équipes jamais vues : (attaque, défense) sur l'échelle de team_record()
+TIERS = (
+    (("Real Madrid", "Manchester City", "Bayern Munich", "Liverpool", "Arsenal"), (90, 85)),
+    (("Paris Saint Germain", "Barcelona", "Inter", "Bayer Leverkusen", "Juventus"), (85, 82)),
+    (("AC Milan", "Tottenham", "Chelsea", "Manchester United", "Borussia Dortmund"), (81, 78)),
+    (("Marseille", "Lille", "Monaco", "Newcastle", "AS Roma", "Benfica", "Lens"), (77, 75)),
+)
+_TIER_OF = {name: scores for names, scores in TIERS for name in names}
+
+
+def prior(team_name):
+    """(buts marqués, buts encaissés) par match attendus pour une équipe sans historique."""
+    scores = _TIER_OF.get(team_name)
+    if scores is None: return LEAGUE_AVG_GOALS, LEAGUE_AVG_GOALS
+    atk, df = scores
+    return atk / 100 * 2.5, (100 - df) / 100 * 2.0
+
+
+def to_stats(atk, dfn, form):
+    """Notes -> dict au format de team_record() (échelle 0-100 du modèle)."""
+    results = [r for r in form if r >= 0]
+    return {
+        'atk': min(100, int(atk / 2.5 * 100)),
+        'def': max(10, min(100, int(100 - dfn / 2.0 * 100))),
+        'xg': round(float(atk), 2),
+        'form_str': "".join('W' if r == 3 else 'D' if r == 1 else 'L' for r in results) or 'Non dispo',
+        'rank': '-',
+        'dyn': int(sum(results) / (len(results) * 3) * 100) if results else 70,
+        'is_fallback': True,
+    }
+
+
+def stats_for_unknown(team_name):
+    return to_stats(*prior(team_name), ())
+
+
+class RatingTable:
+    """team_id -> ligne des tableaux atk / dfn / played / form ; un verrou pour lectures et mises à jour."""
+
+    def __init__(self, path=RATINGS_PATH, capacity=1024):
+        self.path = path
+        self.loaded_mtime = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._row = {}
+        self._seen = {}         # fixture_id -> timestamp du coup d'envoi
+        self._horizon = 0       # matchs antérieurs : hors de _seen, donc refusés
+        self._alloc(capacity)
+        if path and os.path.exists(path):
+            try: self._load()
+            except Exception:  # fichier absent, tronqué ou d'un ancien format : on repart de zéro
+                self._row, self._seen, self._horizon = {}, {}, 0
+                self._alloc(capacity)
+
+    def _alloc(self, capacity):
+        self.atk = np.full(capacity, LEAGUE_AVG_GOALS)
+        self.dfn = np.full(capacity, LEAGUE_AVG_GOALS)
+        self.played = np.zeros(capacity, dtype=np.int32)
+        # Points des FORM_LENGTH derniers matchs, le plus récent en dernier ; -1 = vide
+        self.form = np.full((capacity, FORM_LENGTH), -1, dtype=np.int8)
+
+    def _grow(self):
+        old = (self.atk, self.dfn, self.played, self.form)
+        self._alloc(len(self.atk) * 2)
+        n = len(old[0])
+        self.atk[:n], self.dfn[:n], self.played[:n], self.form[:n] = old
+
+    def _team_row(self, team_id, team_name):
+        row = self._row.get(team_id)
+        if row is None:
+            row = len(self._row)
+            if row == len(self.atk): self._grow()
+            self._row[team_id] = row
+            self.atk[row], self.dfn[row] = prior(team_name)
+        return row
+
+    def __len__(self):
+        return len(self._row)
+
+    def stats(self, team_id, team_name):
+        with self._lock:
+            row = self._row.get(team_id)
+            if row is None: return stats_for_unknown(team_name)
+            return to_stats(self.atk[row], self.dfn[row], self.form[row])
+
+    def update(self, fixture):
+        """Intègre un match terminé (records.Fixture). False s'il est déjà compté ou pas terminé."""
+        gh, ga = fixture.score_90
+        if fixture.status not in sports_api.FINISHED_STATUSES or gh is None or ga is None: return False
+
+        with self._lock:
+            if fixture.timestamp < self._horizon or fixture.id in self._seen: return False
+            self._seen[fixture.id] = fixture.timestamp
+            h, a = self._team_row(fixture.home.id, fixture.home.name), self._team_row(fixture.away.id, fixture.away.name)
+            exp_h = self.atk[h] * self.dfn[a] / LEAGUE_AVG_GOALS * HOME_FACTOR
+            exp_a = self.atk[a] * self.dfn[h] / LEAGUE_AVG_GOALS / HOME_FACTOR
+            # Écart au score attendu réparti entre l'attaque de l'un et la défense de l'autre
+            self.atk[h] += LEARNING_RATE * (gh - exp_h)
+            self.dfn[a] += LEARNING_RATE * (gh - exp_h)
+            self.atk[a] += LEARNING_RATE * (ga - exp_a)
+            self.dfn[h] += LEARNING_RATE * (ga - exp_a)
+            for row in (h, a):
+                self.atk[row] = np.clip(self.atk[row], *RATING_BOUNDS)
+                self.dfn[row] = np.clip(self.dfn[row], *RATING_BOUNDS)
+            pts_h = 3 if gh > ga else 1 if gh == ga else 0
+            for row, pts in ((h, pts_h), (a, 3 if pts_h == 0 else 1 if pts_h == 1 else 0)):
+                self.form[row, :-1] = self.form[row, 1:]
+                self.form[row, -1] = pts
+                self.played[row] += 1
+        return True
+
+    def update_many(self, fixtures):
+        """Matchs traités par ordre chronologique, table sauvegardée s'il y a du nouveau."""
+        ordered = sorted(fixtures, key=lambda f: f.timestamp)
+        added = sum(self.update(f) for f in ordered)
+        if added:
+            self._prune()
+            self.save()
+        return added
+
+    def _prune(self):
+        """Oublie les matchs sortis de SEEN_RETENTION (par rapport au plus récent compté)."""
+        with self._lock:
+            if not self._seen: return
+            self._horizon = max(self._horizon, max(self._seen.values()) - SEEN_RETENTION)
+            self._seen = {fid: ts for fid, ts in self._seen.items() if ts >= self._horizon}
+
+    def save(self):
+        if not self.path: return
+        with self._lock:
+            n = len(self._row)
+            ids = np.fromiter(self._row, dtype=np.int64, count=n)
+            rows = np.fromiter(self._row.values(), dtype=np.int64, count=n)
+            data = dict(ids=ids, atk=self.atk[rows], dfn=self.dfn[rows], played=self.played[rows], form=self.form[rows],
+                        seen=np.fromiter(self._seen, dtype=np.int64, count=len(self._seen)),
+                        seen_ts=np.fromiter(self._seen.values(), dtype=np.int64, count=len(self._seen)),
+                        horizon=np.int64(self._horizon))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._save_lock:
+            tmp = f"{self.path}.{os.getpid()}.tmp.npz"
+            np.savez(tmp, **data)
+            os.replace(tmp, self.path)
+            self.loaded_mtime = os.path.getmtime(self.path)
+
+    def _load(self):
+        self.loaded_mtime = os.path.getmtime(self.path)
+        with np.load(self.path) as data:
+            ids = data['ids']
+            self._alloc(max(len(self.atk), 2 * len(ids)))
+            n = len(ids)
+            self.atk[:n], self.dfn[:n], self.played[:n], self.form[:n] = data['atk'], data['dfn'], data['played'], data['form']
+            self._row = {int(team_id): i for i, team_id in enumerate(ids)}
+            seen = data['seen'].tolist()
+            if 'seen_ts' in data:
+                self._seen = dict(zip(seen, data['seen_ts'].tolist()))
+                self._horizon = int(data['horizon'])
+            else:
+                # Ancien fichier sans dates : ids gardés jusqu'à ce que l'horizon les dépasse
+                now = int(time.time())
+                self._seen = dict.fromkeys(seen, now)
+
+
+# Relecture du fichier quand un autre processus (python prefetch.py) l'a mis à jour
+RELOAD_INTERVAL = 60
+
+_state = {"table": None, "checked_at": 0.0}
+_init_lock = threading.Lock()
+
+
+def get_table():
+    with _init_lock:
+        now = time.monotonic()
+        if _state["table"] is None:
+            _state["table"], _state["checked_at"] = RatingTable(), now
+        elif now - _state["checked_at"] > RELOAD_INTERVAL:
+            _state["checked_at"] = now
+            path = _state["table"].path
+            if path and os.path.exists(path) and os.path.getmtime(path) != _state["table"].loaded_mtime:
+                _state["table"] = RatingTable(path)
+        return _state["table"]
+
+
+def refresh(days=2, now=None):
+    """Intègre les résultats des `days` derniers jours (aujourd'hui compris). Renvoie le nombre de matchs ajoutés."""
+    now = now or datetime.now()
+    fixtures = []
+    for i in reversed(range(days)):
+        fixtures.extend(sports_api.fetch_results((now - timedelta(days=i)).strftime("%Y-%m-%d")))
+    return get_table().update_many(fixtures)
+
+
+def _collect_metrics():
+    return [("rated_teams", "gauge", {}, len(get_table()))]
+
+
+metrics.register_collector(_collect_metrics)
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument("--days", type=int, default=2)
+    args = p.parse_args()
+    print(f"{refresh(args.days)} matchs intégrés, {len(get_table())} équipes notées")
@@ -0,0 +1,66 @@
+"""Enregistrements compacts projetés une fois à l'ingestion des réponses API-sports.
+
+Les caches (st.cache_data), la session et les vues ne manipulent que ces objets :
+quelques champs utiles au lieu du JSON complet (stade, arbitre, périodes...),
+donc moins de mémoire par session et un pickle bien plus léger à chaque hit.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class Team:
+    id: int
+    name: str
+    logo: str
+
+    @classmethod
+    def from_api(cls, team):
+        return cls(team['id'], team['name'], team.get('logo') or '')
+
+
+@dataclass(frozen=True, slots=True)
+class Fixture:
+    id: int
+    timestamp: int
+    date: str                 # ISO, déjà dans le fuseau demandé à l'API
+    status: str
+    league_id: int
+    league_name: str
+    home: Team
+    away: Team
+    goals_home: int | None    # score affiché : final (prolongations comprises) ou actuel en direct
+    goals_away: int | None
+    elapsed: int | None = None  # minute de jeu, matchs en cours uniquement
+    ft_home: int | None = None  # score à 90 minutes (score.fulltime), rempli une fois le temps réglementaire fini
+    ft_away: int | None = None
+
+    @property
+    def score_90(self):
+        """Score du temps réglementaire (modèle, notes) : fulltime s'il est connu, sinon le score."""
+        if self.ft_home is not None and self.ft_away is not None: return self.ft_home, self.ft_away
+        return self.goals_home, self.goals_away
+
+    @property
+    def day(self):
+        return self.date[:10]
+
+    @classmethod
+    def from_api(cls, f):
+        goals = f.get('goals') or {}
+        ft = (f.get('score') or {}).get('fulltime') or {}
+        return cls(
+            f['fixture']['id'], f['fixture']['timestamp'], f['fixture']['date'], f['fixture']['status']['short'],
+            f['league']['id'], f['league'].get('name', ''),
+            Team.from_api(f['teams']['home']), Team.from_api(f['teams']['away']),
+            goals.get('home'), goals.get('away'), f['fixture']['status'].get('elapsed'),
+            ft.get('home'), ft.get('away'),
+        )
+
+
+def fixtures_from_api(items):
+    """Projection d'une liste `response` ; les entrées incomplètes sont ignorées."""
+    fixtures = []
+    for item in items:
+        try: fixtures.append(Fixture.from_api(item))
+        except (KeyError, TypeError): pass
+    return fixtures
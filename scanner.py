@@ -0,0 +1,139 @@
+"""Scanner de value bets sur tout le catalogue.
+
+Calcule en lot les probabilités du modèle pour chaque match de la fenêtre,
+les confronte aux cotes groupées et classe les issues par espérance de gain.
+Un thread de fond relance le scan périodiquement ; l'app ne lit que le dernier résultat.
+Ce scan ne lit que le cache disque (rempli par le préchauffage, budgété) : il ne
+consomme aucun appel API, même sans personne de connecté.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import sports_api
+from model import (GOALS_VALUE_THRESHOLD, VALUE_THRESHOLDS, build_team_index, calculate_probabilities_batch,
+                   calculate_true_stats, market_fair, value_flags)
+from odds import OddsTable
+from score_matrix import goal_markets
+
+# Issues classées : 1X2, Over 2.5 et BTTS oui (colonnes des probabilités de model_probabilities)
+OUTCOMES = ('Home', 'Draw', 'Away', 'Over 2.5', 'Yes')
+THRESHOLDS = np.array([VALUE_THRESHOLDS['Home'], VALUE_THRESHOLDS['Draw'], VALUE_THRESHOLDS['Away'],
+                       GOALS_VALUE_THRESHOLD, GOALS_VALUE_THRESHOLD])
+# Marché complet de chaque issue : la marge se retire sur le marché entier
+_MARKETS = (('Home', 'Draw', 'Away'), ('Over 2.5', 'Under 2.5'), ('Yes', 'No'))
+_MARKET_COLUMNS = [sum(_MARKETS, ()).index(o) for o in OUTCOMES]
+# Au-delà de la fraîcheur des cotes (api_cache : 600 s), un scan plus fréquent relirait les mêmes copies
+SCAN_INTERVAL = int(os.environ.get("VALUE_SCAN_INTERVAL", 900))
+COLUMNS = ['fixture_id', 'kickoff', 'league', 'home', 'away', 'market', 'prob', 'fair', 'odd', 'books', 'ev', 'value']
+
+
+def model_probabilities(stats_h, stats_a):
+    """(probas (n, len(OUTCOMES)), marchés buts complets de goal_markets)."""
+    goals = goal_markets([s['xg'] for s in stats_h], [s['xg'] for s in stats_a])
+    probs = np.column_stack(calculate_probabilities_batch(stats_h, stats_a)) / 100
+    return np.column_stack([probs, goals['over'][2.5], goals['btts']]), goals
+
+
+def market_prices(odds_table, fixture_ids):
+    """(meilleures cotes, probas justes), tableaux (n, len(OUTCOMES)) ; NaN sans cote."""
+    best, fair = [], []
+    for market in _MARKETS:
+        offered = odds_table.lookup(fixture_ids, 'best', market)
+        best.append(offered)
+        fair.append(market_fair(offered, odds_table.lookup(fixture_ids, 'fair', market)))
+    return np.hstack(best)[:, _MARKET_COLUMNS], np.hstack(fair)[:, _MARKET_COLUMNS]
+
+
+def scan_fixtures(fixtures, odds_table, team_indexes):
+    """Une ligne par (match, issue de OUTCOMES) avec cote connue, triée par EV décroissante (à la meilleure cote).
+
+    `fixtures` : records.Fixture ; `odds_table` : odds.OddsTable ; `team_indexes` : league_id -> index de build_team_index.
+    """
+    if not fixtures: return pd.DataFrame(columns=COLUMNS)
+
+    stats_h = [calculate_true_stats(f.home.id, f.home.name, team_indexes.get(f.league_id)) for f in fixtures]
+    stats_a = [calculate_true_stats(f.away.id, f.away.name, team_indexes.get(f.league_id)) for f in fixtures]
+    probs, _ = model_probabilities(stats_h, stats_a)
+
+    ids = [f.id for f in fixtures]
+    odds, fair = market_prices(odds_table, ids)
+    books = odds_table.books_for(ids)
+
+    ev = probs * odds - 1
+    value = value_flags(probs, odds, fair, THRESHOLDS)
+    rows, cols = np.nonzero(odds > 1)
+
+    df = pd.DataFrame({
+        'fixture_id': [fixtures[i].id for i in rows],
+        'kickoff': [fixtures[i].date for i in rows],
+        'league': [sports_api.TOP_LEAGUES.get(fixtures[i].league_id, fixtures[i].league_name) for i in rows],
+        'home': [fixtures[i].home.name for i in rows],
+        'away': [fixtures[i].away.name for i in rows],
+        'market': [OUTCOMES[j] for j in cols],
+        'prob': probs[rows, cols].round(3),
+        'fair': fair[rows, cols].round(3),
+        'odd': odds[rows, cols],
+        'books': books[rows],
+        'ev': ev[rows, cols].round(3),
+        'value': value[rows, cols],
+    }, columns=COLUMNS)
+    return df.sort_values('ev', ascending=False, ignore_index=True)
+
+
+def load_window(date_from, days, offline=False):
+    """(matchs, OddsTable, index d'équipes par ligue) de la fenêtre : cotes par date et classements
+    par ligue chargés en parallèle. offline=True : cache disque seul (voir sports_api.api_get)."""
+    catalog = sports_api.fetch_catalog_window(date_from, days, offline)
+    fixtures = [f for day in catalog.values() for f in day]
+    leagues = sorted({f.league_id for f in fixtures})
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        odds_futures = [pool.submit(sports_api.fetch_odds_for_date, d, offline) for d in catalog]
+        indexes = pool.map(lambda lid: build_team_index(sports_api.fetch_standings(lid, offline)), leagues)
+        team_indexes = dict(zip(leagues, indexes))
+        odds_table = OddsTable.concat([fut.result() for fut in odds_futures])
+    return fixtures, odds_table, team_indexes
+
+
+def scan_window(date_from, days, offline=False):
+    return scan_fixtures(*load_window(date_from, days, offline))
+
+
+class ValueScanner:
+    """Relance scan_window (cache disque seul) toutes les `interval` secondes dans un thread daemon."""
+
+    def __init__(self, days=sports_api.CATALOG_DAYS, interval=SCAN_INTERVAL):
+        self.days = days
+        self.interval = interval
+        self._result = None
+        self._scanned_at = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="value-scanner", daemon=True)
+            self._thread.start()
+        return self
+
+    def _loop(self):
+        while True:
+            try: self.run_once()
+            except Exception: pass
+            time.sleep(self.interval)
+
+    def run_once(self):
+        df = scan_window(datetime.now().strftime("%Y-%m-%d"), self.days, offline=True)
+        with self._lock:
+            self._result, self._scanned_at = df, datetime.now()
+        return df
+
+    def latest(self):
+        """(DataFrame, horodatage) du dernier scan, (None, None) tant que le premier tourne."""
+        with self._lock:
+            return self._result, self._scanned_at
@@ -0,0 +1,108 @@
+"""Moteur Poisson vectorisé : matrice de score complète et tous les marchés buts.
+
+Toutes les fonctions prennent des tableaux de xG (un élément par match) et
+calculent le catalogue entier en un seul appel NumPy.
+"""
+import numpy as np
+
+import metrics
+
+MAX_GOALS = 10
+OU_LINES = (0.5, 1.5, 2.5, 3.5, 4.5, 5.5)
+AH_LINES = (-2.5, -2.0, -1.5, -1.0, -0.5, 0.0, 0.5, 1.0, 1.5, 2.0, 2.5)
+
+_K = np.arange(MAX_GOALS + 1)
+_LOG_FACT = np.concatenate(([0.0], np.cumsum(np.log(np.arange(1, MAX_GOALS + 1)))))
+# Pour chaque case (i, j) de la matrice : total de buts et écart (i - j), en one-hot
+_TOTAL_OF = np.add.outer(_K, _K).ravel()
+_DIFF_OF = np.subtract.outer(_K, _K).ravel()
+_TOTAL_ONEHOT = (_TOTAL_OF[:, None] == np.arange(2 * MAX_GOALS + 1)).astype(float)
+_DIFF_ONEHOT = (_DIFF_OF[:, None] == np.arange(-MAX_GOALS, MAX_GOALS + 1)).astype(float)
+
+
+def poisson_pmf(lmbda):
+    """(n,) -> (n, MAX_GOALS+1) ; la queue au-delà de MAX_GOALS est reportée sur la dernière case."""
+    lmbda = np.clip(np.asarray(lmbda, dtype=float).reshape(-1), 1e-9, None)
+    pmf = np.exp(_K * np.log(lmbda)[:, None] - lmbda[:, None] - _LOG_FACT)
+    pmf[:, -1] += np.clip(1.0 - pmf.sum(axis=1), 0.0, None)
+    return pmf
+
+
+def score_matrix(xg_h, xg_a):
+    """Probabilité jointe de chaque score exact, forme (n, MAX_GOALS+1, MAX_GOALS+1)."""
+    return poisson_pmf(xg_h)[:, :, None] * poisson_pmf(xg_a)[:, None, :]
+
+
+@metrics.timed("goal_markets")
+def goal_markets(xg_h, xg_a):
+    """Tous les marchés dérivés de la matrice de score, chaque valeur étant un tableau (n,)."""
+    m = score_matrix(xg_h, xg_a)
+    flat = m.reshape(len(m), -1)
+    total = flat @ _TOTAL_ONEHOT          # P(total = t), t = 0..2*MAX_GOALS
+    diff = flat @ _DIFF_ONEHOT            # P(dom - ext = d), d = -MAX_GOALS..MAX_GOALS
+    total_cdf = np.cumsum(total, axis=1)
+    diff_cdf = np.cumsum(diff, axis=1)
+    zero = MAX_GOALS                      # index de l'écart 0
+
+    under = {line: total_cdf[:, int(line)] for line in OU_LINES}
+    markets = {
+        'home': diff[:, zero + 1:].sum(axis=1),
+        'draw': diff[:, zero],
+        'away': diff[:, :zero].sum(axis=1),
+        'under': under,
+        'over': {line: 1.0 - p for line, p in under.items()},
+        'btts': 1.0 - m[:, 0, :].sum(axis=1) - m[:, :, 0].sum(axis=1) + m[:, 0, 0],
+        'correct_score': m,
+        'ah_home': {}, 'ah_push': {}, 'ah_away': {},
+    }
+    # Handicap asiatique côté domicile : gagne si écart + ligne > 0, remboursé si = 0
+    for line in AH_LINES:
+        # plus grand écart d tel que d + line <= 0
+        cut = int(np.floor(-line)) + zero
+        lose_or_push = diff_cdf[:, cut] if cut >= 0 else np.zeros(len(m))
+        push = diff[:, cut] if float(line).is_integer() and 0 <= cut < diff.shape[1] else np.zeros(len(m))
+        markets['ah_home'][line] = 1.0 - lose_or_push
+        markets['ah_push'][line] = push
+        markets['ah_away'][line] = lose_or_push - push
+    return markets
+
+
+@metrics.timed("in_play_markets")
+def in_play_markets(xg_h, xg_a, elapsed, goals_h, goals_a, duration=90):
+    """1X2, Over 2.5 et BTTS en cours de match, tableaux (n,).
+
+    Les buts restants suivent une loi de Poisson de paramètre xG * temps restant / durée,
+    ajoutés au score actuel.
+    """
+    remaining = np.clip(1.0 - np.asarray(elapsed, dtype=float) / duration, 0.0, 1.0)
+    goals_h = np.asarray(goals_h, dtype=int)
+    goals_a = np.asarray(goals_a, dtype=int)
+    pmf_h = poisson_pmf(np.asarray(xg_h, dtype=float) * remaining)
+    pmf_a = poisson_pmf(np.asarray(xg_a, dtype=float) * remaining)
+    flat = (pmf_h[:, :, None] * pmf_a[:, None, :]).reshape(len(pmf_h), -1)
+    diff_cdf = np.cumsum(flat @ _DIFF_ONEHOT, axis=1)
+    total_cdf = np.cumsum(flat @ _TOTAL_ONEHOT, axis=1)
+    rows = np.arange(len(flat))
+
+    # Victoire dom : écart restant > ext - dom ; nul : écart restant = ext - dom
+    lead = np.clip(goals_a - goals_h + MAX_GOALS, -1, 2 * MAX_GOALS)
+    at_most_lead = np.where(lead >= 0, diff_cdf[rows, np.maximum(lead, 0)], 0.0)
+    below_lead = np.where(lead >= 1, diff_cdf[rows, np.maximum(lead - 1, 0)], 0.0)
+    # Over 2.5 : au moins 3 - (buts déjà marqués) buts restants
+    need = 2 - (goals_h + goals_a)
+    return {
+        'home': 1.0 - at_most_lead,
+        'draw': at_most_lead - below_lead,
+        'away': below_lead,
+        'over25': np.where(need >= 0, 1.0 - total_cdf[rows, np.maximum(need, 0)], 1.0),
+        'btts': np.where(goals_h > 0, 1.0, 1.0 - pmf_h[:, 0]) * np.where(goals_a > 0, 1.0, 1.0 - pmf_a[:, 0]),
+    }
+
+
+def top_scores(xg_h, xg_a, n=3):
+    """Les n scores exacts les plus probables par match : liste de [(dom, ext, proba), ...]."""
+    m = score_matrix(xg_h, xg_a)
+    flat = m.reshape(len(m), -1)
+    best = np.argsort(flat, axis=1)[:, ::-1][:, :n]
+    size = MAX_GOALS + 1
+    return [[(int(k // size), int(k % size), float(row[k])) for k in idx] for row, idx in zip(flat, best)]
@@ -0,0 +1,238 @@
+"""Couche d'accès API-sports : session HTTP poolée, cache disque et chargeurs de données.
+
+Aucune dépendance à Streamlit : l'app enveloppe ces fonctions avec st.cache_data,
+les scripts et tâches de fond les appellent directement. Les matchs sont renvoyés
+en records.Fixture, projetés dès la réception de la réponse.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from api_cache import ResponseCache, make_key
+from governor import ApiError, QuotaGovernor
+from odds import parse_odds
+from records import fixtures_from_api
+
+BASE_URL = os.environ.get("API_SPORTS_BASE_URL", "https://v3.football.api-sports.io")
+TIMEZONE = "Europe/Paris"
+
+# Compétitions majeures du catalogue
+TOP_LEAGUES = {
+    2: "🇪🇺 Champions League",
+    3: "🇪🇺 Europa League",
+    39: "🇬🇧 Premier League",
+    61: "🇫🇷 Ligue 1",
+    78: "🇩🇪 Bundesliga",
+    135: "🇮🇹 Serie A",
+    140: "🇪🇸 La Liga"
+}
+VALID_STATUSES = ('NS', 'TBD', 'PST')
+FINISHED_STATUSES = ('FT', 'AET', 'PEN')
+LIVE_STATUSES = ('1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE')
+# Fenêtre du catalogue : aujourd'hui + 2 jours
+CATALOG_DAYS = 3
+
+_state = {"api_key": os.environ.get("API_SPORTS_KEY", ""), "base_url": BASE_URL, "session": None, "cache": None}
+_init_lock = threading.Lock()
+# Tous les appels réseau passent par le gouverneur (coalescence, rate-limit, retry, mode dégradé)
+governor = QuotaGovernor()
+
+
+def configure(api_key, base_url=None):
+    with _init_lock:
+        base_url = base_url or _state["base_url"]
+        if api_key == _state["api_key"] and base_url == _state["base_url"]: return
+        _state.update(api_key=api_key, base_url=base_url, session=None)
+
+
+def get_session():
+    # Une seule session par processus : keep-alive + pool partagé par tous les threads
+    with _init_lock:
+        if _state["session"] is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers.update({"x-apisports-key": _state["api_key"]})
+            _state["session"] = s
+        return _state["session"]
+
+
+def get_cache():
+    with _init_lock:
+        if _state["cache"] is None:
+            _state["cache"] = ResponseCache()
+        return _state["cache"]
+
+
+def network_calls():
+    """Nombre d'appels réellement envoyés à API-sports par ce processus (hors cache, retries compris)."""
+    return governor.status()["sent"]
+
+
+def api_status():
+    return governor.status()
+
+
+def api_get(endpoint, params, timeout=10, cache=True, offline=False):
+    """Réponse JSON de l'API (cache disque d'abord). Lève ApiError si rien n'est disponible.
+
+    cache=False pour les gros historiques qui ont leur propre stockage (backtest).
+    offline=True : copie disque seule, jamais d'appel réseau ({} si absente ou périmée).
+    """
+    if offline: return get_cache().peek(endpoint, params) or {}
+    def send():
+        try:
+            with metrics.timer("api_request_seconds", endpoint=endpoint):
+                resp = get_session().get(f"{_state['base_url']}{endpoint}", params=params, timeout=timeout)
+        except Exception:
+            metrics.inc("api_calls_total", endpoint=endpoint, status="error")
+            raise
+        metrics.inc("api_calls_total", endpoint=endpoint, status=resp.status_code)
+        metrics.inc("api_bytes_total", len(resp.content), endpoint=endpoint)
+        return resp
+
+    def load():
+        r = governor.call(make_key(endpoint, params), send)
+        # Erreur API (paramètres, abonnement...) : réponse 200 avec 'errors' rempli, à ne pas mettre en cache
+        return None if r.get('errors') else r
+    if not cache: return load() or {}
+    return get_cache().fetch(endpoint, params, load) or {}
+
+
+def current_season(now=None):
+    now = now or datetime.now()
+    return now.year if now.month >= 7 else now.year - 1
+
+
+# --- CATALOGUE ---
+def fetch_league_window(league_id, date_from, date_to, offline=False):
+    # Filtrage ligue + statut côté serveur : la réponse ne contient que ce qu'on affiche
+    try:
+        r = api_get("/fixtures", {
+            "league": league_id, "season": current_season(datetime.strptime(date_from, "%Y-%m-%d")),
+            "from": date_from, "to": date_to, "status": "-".join(VALID_STATUSES), "timezone": TIMEZONE
+        }, offline=offline)
+        return [f for f in fixtures_from_api(r.get('response', [])) if f.status in VALID_STATUSES]
+    except ApiError: return []
+
+
+@metrics.timed("fetch_catalog_window")
+def fetch_catalog_window(date_from, days, offline=False):
+    """Matchs des TOP_LEAGUES sur `days` jours à partir de `date_from`, groupés par date locale.
+
+    Une requête par ligue couvrant toute la fenêtre, lancées en parallèle sur la
+    session poolée : un seul aller-retour de petites réponses au lieu d'une liste
+    mondiale par jour.
+    """
+    start = datetime.strptime(date_from, "%Y-%m-%d")
+    dates = [(start + timedelta(days=i)).strftime("%Y-%m-%d") for i in range(days)]
+    with ThreadPoolExecutor(max_workers=len(TOP_LEAGUES)) as pool:
+        per_league = pool.map(lambda lid: fetch_league_window(lid, dates[0], dates[-1], offline), TOP_LEAGUES)
+        fixtures = [f for league_fixtures in per_league for f in league_fixtures]
+    fixtures.sort(key=lambda f: f.timestamp)
+
+    by_date = {d: [] for d in dates}
+    for f in fixtures:
+        # La date ISO est déjà exprimée dans TIMEZONE
+        if f.day in by_date: by_date[f.day].append(f)
+    return by_date
+
+
+@metrics.timed("fetch_live")
+def fetch_live():
+    """Matchs en cours des TOP_LEAGUES, en une requête ; None si l'API ne répond pas.
+
+    Jamais mis en cache disque : live.LiveBoard est le seul appelant et impose la cadence.
+    """
+    try:
+        r = api_get("/fixtures", {"live": "-".join(str(lid) for lid in TOP_LEAGUES), "timezone": TIMEZONE}, cache=False)
+    except ApiError: return None
+    if not r: return None
+    return [f for f in fixtures_from_api(r.get('response', [])) if f.status in LIVE_STATUSES]
+
+
+@metrics.timed("fetch_results")
+def fetch_results(date_str):
+    """Tous les matchs terminés d'une date, toutes compétitions (alimente les notes d'équipes)."""
+    try:
+        r = api_get("/fixtures", {"date": date_str, "status": "-".join(FINISHED_STATUSES), "timezone": TIMEZONE}, timeout=20)
+        return fixtures_from_api(r.get('response', []))
+    except ApiError: return []
+
+
+# --- DONNÉES MATCH ---
+@metrics.timed("fetch_standings")
+def fetch_standings(league_id, offline=False):
+    try:
+        r = api_get("/standings", {"league": league_id, "season": current_season()}, offline=offline)
+        return r.get('response', [])
+    except ApiError: return []
+
+
+@metrics.timed("get_match_odds")
+def get_match_odds(fixture_id):
+    """Résumé multi-bookmakers d'un match (voir OddsTable.get), {} sans cote."""
+    if fixture_id:
+        try:
+            r = api_get("/odds", {"fixture": fixture_id}, timeout=5)
+            return parse_odds(r.get('response', [])).get(fixture_id) or {}
+        except ApiError: pass
+    return {}
+
+
+def _fetch_odds_pages(params, offline=False):
+    # Page 1 donne le nombre total de pages, les suivantes partent en parallèle
+    first = api_get("/odds", {**params, "page": 1}, offline=offline)
+    items = list(first.get('response', []))
+    total = (first.get('paging') or {}).get('total', 1)
+    if total > 1:
+        with ThreadPoolExecutor(max_workers=min(8, total - 1)) as pool:
+            for r in pool.map(lambda p: api_get("/odds", {**params, "page": p}, offline=offline), range(2, total + 1)):
+                items.extend(r.get('response', []))
+    return items
+
+
+@metrics.timed("fetch_odds_for_date")
+def fetch_odds_for_date(date_str, offline=False):
+    """OddsTable de tous les matchs TOP_LEAGUES d'une date (tous bookmakers, 1X2 / +-2.5 / BTTS)."""
+    season = current_season(datetime.strptime(date_str, "%Y-%m-%d"))
+
+    def league_odds(league_id):
+        try: return _fetch_odds_pages({"league": league_id, "season": season, "date": date_str, "timezone": TIMEZONE}, offline)
+        except ApiError: return []
+
+    with ThreadPoolExecutor(max_workers=len(TOP_LEAGUES)) as pool:
+        items = [item for league_items in pool.map(league_odds, TOP_LEAGUES) for item in league_items]
+    return parse_odds(items)
+
+
+@metrics.timed("fetch_h2h")
+def fetch_h2h(team_id_1, team_id_2):
+    try:
+        r = api_get("/fixtures/headtohead", {"h2h": f"{team_id_1}-{team_id_2}", "last": 3}, timeout=5)
+        return fixtures_from_api(r.get('response', []))
+    except ApiError: return []
+
+
+# --- MÉTRIQUES ---
+def _collect_metrics():
+    rows = []
+    for endpoint, counts in get_cache().stats()["endpoints"].items():
+        for outcome, value in counts.items():
+            rows.append(("cache_requests_total", "counter", {"endpoint": endpoint, "outcome": outcome}, value))
+    status = governor.status()
+    for name in ("coalesced", "retries", "failures"):
+        rows.append((f"api_{name}_total", "counter", {}, status[name]))
+    rows.append(("api_degraded", "gauge", {}, int(status["degraded"])))
+    if status["daily_remaining"] is not None:
+        rows.append(("api_daily_remaining", "gauge", {}, status["daily_remaining"]))
+    return rows
+
+
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,37 @@
+"""Limiteurs de débit partagés par les threads d'un processus."""
+import threading
+import time
+
+
+class TokenBucket:
+    """Seau à jetons bloquant : `acquire()` attend son tour au lieu d'échouer."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                self._refill(time.monotonic())
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def update(self, rate=None, capacity=None, available=None):
+        """Recale le seau sur les limites annoncées par le serveur."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if rate: self.rate = rate
+            if capacity: self.capacity = capacity
+            self._tokens = min(self._tokens, self.capacity)
+            if available is not None: self._tokens = min(self._tokens, available)